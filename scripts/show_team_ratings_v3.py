@@ -22,6 +22,8 @@ from src.data_collector import DataCollector
 import config
 from datetime import datetime, timedelta
 from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
 import numpy as np
 
 # Phase 3C Enhancement Parameters
@@ -29,6 +31,9 @@ DEFAULT_HOME_COURT_ADVANTAGE = 3.5  # Default if insufficient data
 RECENCY_DECAY = 0.98  # Exponential decay for game weights
 MOV_DIMINISHING_THRESHOLD = 10  # Full value up to 10 points, then logarithmic
 
+# Pythagorean expectation exponent (empirically determined for college basketball)
+PYTHAGOREAN_EXPONENT = 11.5
+
 # Pace adjustment parameters
 PACE_ESTIMATE_FACTOR = 1.5  # Rough estimate: possessions ≈ total_points / 1.5
 PACE_NORMALIZATION = 100  # Convert to per-100 possessions
@@ -62,6 +67,27 @@ CONFERENCE_TOURNAMENT_VENUES = [
     'san antonio', 'salt lake city', 'denver', 'portland', 'seattle'
 ]
 
+# Conference tournament patterns (same conference teams)
+CONFERENCE_RIVALS = [
+    # Big Ten tournament style matchups
+    ('michigan', 'ohio state'), ('michigan', 'purdue'), ('purdue', 'indiana'),
+    ('illinois', 'northwestern'), ('wisconsin', 'minnesota'),
+    # Big 12 tournament style
+    ('kansas', 'texas'), ('kansas', 'oklahoma'), ('houston', 'cincinnati'),
+    # ACC tournament style
+    ('duke', 'north carolina'), ('clemson', 'florida state'),
+    # SEC tournament style
+    ('alabama', 'tennessee'), ('florida', 'georgia'), ('auburn', 'lsu')
+]
+
+@lru_cache(maxsize=4096)
+def _parse_game_date(date_str: str):
+    """Parse an ISO date string, cached since many games share the same date."""
+    try:
+        return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
 def is_neutral_court_game(game: dict) -> bool:
     """
     Practical neutral court detection for college basketball.
@@ -71,16 +97,17 @@ def is_neutral_court_game(game: dict) -> bool:
     2. Conference tournament patterns
     3. Known tournament teams/dates
     """
+    # Any API flags (if they exist) settle it without further work
+    if game.get('neutral_site') or game.get('neutral'):
+        return True
+
     try:
         # Method 1: Tournament season (March/April) - high likelihood of neutral courts
+        parsed_date = None
         game_date = game.get('date', '')
         if game_date:
-            from datetime import datetime
             if isinstance(game_date, str):
-                try:
-                    parsed_date = datetime.fromisoformat(game_date.replace('Z', '+00:00'))
-                except:
-                    parsed_date = None
+                parsed_date = _parse_game_date(game_date)
             else:
                 parsed_date = game_date
 
@@ -106,37 +133,17 @@ def is_neutral_court_game(game: dict) -> bool:
 
         # Method 3: Known conference tournament teams
         # During tournament time, certain team combinations suggest neutral courts
-        home_team = str(game.get('HomeTeam', '')).strip()
-        away_team = str(game.get('AwayTeam', '')).strip()
-
-        # Conference tournament patterns (same conference teams)
-        conference_rivals = [
-            # Big Ten tournament style matchups
-            ('michigan', 'ohio state'), ('michigan', 'purdue'), ('purdue', 'indiana'),
-            ('illinois', 'northwestern'), ('wisconsin', 'minnesota'),
-            # Big 12 tournament style
-            ('kansas', 'texas'), ('kansas', 'oklahoma'), ('houston', 'cincinnati'),
-            # ACC tournament style
-            ('duke', 'north carolina'), ('clemson', 'florida state'),
-            # SEC tournament style
-            ('alabama', 'tennessee'), ('florida', 'georgia'), ('auburn', 'lsu')
-        ]
-
-        home_lower = home_team.lower()
-        away_lower = away_team.lower()
-
-        for team1, team2 in conference_rivals:
-            if ((team1 in home_lower and team2 in away_lower) or
-                (team1 in away_lower and team2 in home_lower)):
-                # If it's tournament season, this is likely a neutral court game
-                if parsed_date and parsed_date.month in [3, 4]:
+        if parsed_date and parsed_date.month in [3, 4]:
+            home_lower = str(game.get('HomeTeam', '')).strip().lower()
+            away_lower = str(game.get('AwayTeam', '')).strip().lower()
+
+            for team1, team2 in CONFERENCE_RIVALS:
+                if ((team1 in home_lower and team2 in away_lower) or
+                    (team1 in away_lower and team2 in home_lower)):
+                    # If it's tournament season, this is likely a neutral court game
                     return True
 
-        # Method 4: Any API flags (if they exist)
-        if game.get('neutral_site') or game.get('neutral'):
-            return True
-
-        # Method 5: Check for any location/venue keywords that might exist
+        # Method 4: Check for any location/venue keywords that might exist
         location = str(game.get('location', '')).lower()
         notes = str(game.get('notes', '')).lower()
 
@@ -150,7 +157,62 @@ def is_neutral_court_game(game: dict) -> bool:
 
     return False
 
-def calculate_team_specific_hca_v2(team_id: int, games: list, initial_ratings: dict) -> dict:
+@dataclass
+class GameArray:
+    """
+    Scored games packed into parallel NumPy arrays (structure-of-arrays).
+
+    Built once per rating pass by games_to_arrays so per-team metrics can use
+    vectorized masks instead of re-walking (and re-parsing) the list of game
+    dicts for every team. Index i in every array refers to the same game.
+    """
+    date: np.ndarray        # datetime64[D], NaT when DateTime is missing/invalid
+    home_id: np.ndarray     # int32
+    away_id: np.ndarray     # int32
+    home_score: np.ndarray  # int16
+    away_score: np.ndarray  # int16
+    neutral: np.ndarray     # bool_, from is_neutral_court_game
+
+    def __len__(self) -> int:
+        return len(self.home_id)
+
+    def extend(self, other: 'GameArray') -> 'GameArray':
+        """Return a new GameArray with other's games appended."""
+        return GameArray(**{name: np.concatenate([getattr(self, name), getattr(other, name)])
+                            for name in self.__dataclass_fields__})
+
+def _game_date64(date_str) -> np.datetime64:
+    parsed = _parse_game_date(date_str) if date_str else None
+    return np.datetime64(parsed.date(), 'D') if parsed else np.datetime64('NaT', 'D')
+
+def games_to_arrays(games: list) -> GameArray:
+    """Convert a list of game dicts to a GameArray, keeping only scored games."""
+    scored = [g for g in games
+              if g.get('HomeTeamScore') is not None and g.get('AwayTeamScore') is not None]
+    return GameArray(
+        date=np.array([_game_date64(g.get('DateTime')) for g in scored], dtype='datetime64[D]'),
+        home_id=np.array([g.get('HomeTeamID') or 0 for g in scored], dtype=np.int32),
+        away_id=np.array([g.get('AwayTeamID') or 0 for g in scored], dtype=np.int32),
+        home_score=np.array([g['HomeTeamScore'] for g in scored], dtype=np.int16),
+        away_score=np.array([g['AwayTeamScore'] for g in scored], dtype=np.int16),
+        neutral=np.array([is_neutral_court_game(g) for g in scored], dtype=np.bool_),
+    )
+
+def _team_margins(game_arrays: GameArray, team_id: int) -> tuple:
+    """
+    Margin of every game from team_id's perspective, plus home/away masks.
+
+    The sign is applied as a +1/-1 multiplier rather than a per-game branch;
+    entries outside home_mask | away_mask are meaningless and must be masked.
+    """
+    home_mask = game_arrays.home_id == team_id
+    away_mask = ~home_mask & (game_arrays.away_id == team_id)
+    sign = np.where(home_mask, 1, -1).astype(np.int8)
+    margins = sign * (game_arrays.home_score.astype(np.int32) - game_arrays.away_score)
+    return margins, home_mask, away_mask
+
+def calculate_team_specific_hca_v2(team_id: int, games: list, initial_ratings: dict,
+                                  game_arrays: GameArray = None) -> dict:
     """
     Calculate OPPONENT-ADJUSTED team-specific home court advantage.
     
@@ -170,48 +232,25 @@ def calculate_team_specific_hca_v2(team_id: int, games: list, initial_ratings: d
             'neutral_margin': float
         }
     """
-    home_games = []  # (opponent_id, margin, expected_margin)
-    away_games = []  # (opponent_id, margin, expected_margin)
-    neutral_games = []
-    
+    if game_arrays is None:
+        game_arrays = games_to_arrays(games)
+
     # Get team's baseline rating
     team_rating = initial_ratings.get(team_id, {}).get('overall_rating', 0)
-    
-    for game in games:
-        home_id = game.get('HomeTeamID')
-        away_id = game.get('AwayTeamID')
-        home_score = game.get('HomeTeamScore')
-        away_score = game.get('AwayTeamScore')
-        
-        if home_score is None or away_score is None:
-            continue
-        
-        is_neutral = is_neutral_court_game(game)
-        
-        if home_id == team_id:
-            opponent_id = away_id
-            margin = home_score - away_score
 
-            # Expected margin = our rating - opponent rating
-            opp_rating = initial_ratings.get(opponent_id, {}).get('overall_rating', 0)
-            expected_margin = team_rating - opp_rating
+    team_margins, home_mask, away_mask = _team_margins(game_arrays, team_id)
+    neutral = game_arrays.neutral
 
-            if is_neutral:
-                neutral_games.append(margin)
-            else:
-                home_games.append((opponent_id, margin, expected_margin))
-                
-        elif away_id == team_id:
-            opponent_id = home_id
-            margin = away_score - home_score
-            
-            opp_rating = initial_ratings.get(opponent_id, {}).get('overall_rating', 0)
-            expected_margin = team_rating - opp_rating
-            
-            if is_neutral:
-                neutral_games.append(margin)
-            else:
-                away_games.append((opponent_id, margin, expected_margin))
+    def _venue_games(mask, opponent_ids):
+        # (opponent_id, margin, expected_margin) for the games selected by mask
+        opponents = opponent_ids[mask].tolist()
+        expected = [team_rating - initial_ratings.get(opp, {}).get('overall_rating', 0)
+                    for opp in opponents]
+        return list(zip(opponents, team_margins[mask].tolist(), expected))
+
+    home_games = _venue_games(home_mask & ~neutral, game_arrays.away_id)
+    away_games = _venue_games(away_mask & ~neutral, game_arrays.home_id)
+    neutral_games = team_margins[(home_mask | away_mask) & neutral].tolist()
     
     # Calculate opponent-adjusted performance
     home_performance = []  # actual - expected
@@ -263,30 +302,20 @@ def calculate_team_specific_hca_v2(team_id: int, games: list, initial_ratings: d
         'neutral_games': len(neutral_games)
     }
 
-def calculate_variance_metrics(team_id: int, games: list) -> dict:
+def calculate_variance_metrics(team_id: int, games: list, game_arrays: GameArray = None) -> dict:
     """
     Calculate team consistency/variance metrics.
     High variance = unpredictable, low variance = consistent
+
+    Pass game_arrays (from games_to_arrays) to reuse one conversion across teams.
     """
-    margins = []
-    
-    for game in games:
-        home_id = game.get('HomeTeamID')
-        away_id = game.get('AwayTeamID')
-        home_score = game.get('HomeTeamScore')
-        away_score = game.get('AwayTeamScore')
-        
-        if home_score is None or away_score is None:
-            continue
-        
-        if home_id == team_id:
-            margin = home_score - away_score
-            margins.append(margin)
-        elif away_id == team_id:
-            margin = away_score - home_score
-            margins.append(margin)
+    if game_arrays is None:
+        game_arrays = games_to_arrays(games)
+
+    team_margins, home_mask, away_mask = _team_margins(game_arrays, team_id)
+    margins = team_margins[home_mask | away_mask]
     
-    if not margins:
+    if margins.size == 0:
         return {'variance': 0, 'std_dev': 0, 'consistency_score': 0}
     
     variance = np.var(margins)
@@ -310,19 +339,25 @@ def calculate_adjusted_margin(margin: float) -> float:
         sign = 1 if margin > 0 else -1
         return sign * (MOV_DIMINISHING_THRESHOLD + np.log(abs(margin) - MOV_DIMINISHING_THRESHOLD + 1))
 
+def adjust_margins(margins) -> np.ndarray:
+    """Vectorized calculate_adjusted_margin over an array of margins."""
+    margins = np.asarray(margins, dtype=float)
+    abs_margins = np.abs(margins)
+    excess = np.maximum(abs_margins - MOV_DIMINISHING_THRESHOLD, 0.0)
+    return np.where(
+        abs_margins <= MOV_DIMINISHING_THRESHOLD,
+        margins,
+        np.sign(margins) * (MOV_DIMINISHING_THRESHOLD + np.log1p(excess))
+    )
+
 def calculate_recency_weights(game_dates: list) -> list:
     """Calculate exponential decay weights for recency."""
     if not game_dates:
         return []
     
-    sorted_dates = sorted(game_dates)
-    weights = []
-    for i in range(len(sorted_dates)):
-        days_ago = len(sorted_dates) - 1 - i
-        weight = RECENCY_DECAY ** days_ago
-        weights.append(weight)
-    
-    return weights
+    # Weight decays per game (oldest first), so only the number of games matters
+    games_ago = np.arange(len(game_dates) - 1, -1, -1)
+    return (RECENCY_DECAY ** games_ago).tolist()
 
 def convert_to_pace_adjusted(ppg_scored: float, ppg_allowed: float) -> tuple:
     """
@@ -351,7 +386,8 @@ def convert_to_pace_adjusted(ppg_scored: float, ppg_allowed: float) -> tuple:
 
     return pace_adj_offensive, pace_adj_defensive
 
-def calculate_pythagorean_expectation(points_for: float, points_against: float, exponent: float = 11.5) -> float:
+def calculate_pythagorean_expectation(points_for: float, points_against: float,
+                                      exponent: float = PYTHAGOREAN_EXPONENT) -> float:
     """
     Calculate expected win percentage using Pythagorean formula.
 
@@ -372,13 +408,27 @@ def calculate_pythagorean_expectation(points_for: float, points_against: float,
     if points_for <= 0 or points_against <= 0:
         return 0.5  # Default for invalid data
 
-    # Pythagorean formula
-    expected_win_pct = (points_for ** exponent) / (
-        points_for ** exponent + points_against ** exponent
-    )
+    # Pythagorean formula, rearranged to PF^exp / (PF^exp + PA^exp) = 1 / (1 + (PA/PF)^exp)
+    # so only one power is evaluated and large PF/PA values can't overflow
+    expected_win_pct = 1.0 / (1.0 + (points_against / points_for) ** exponent)
 
     return expected_win_pct
 
+def calculate_pythagorean_expectations(points_for, points_against,
+                                       exponent: float = PYTHAGOREAN_EXPONENT) -> np.ndarray:
+    """
+    Vectorized calculate_pythagorean_expectation for a whole ratings table.
+
+    Computed in float32: win percentages only need a few significant digits,
+    and half-width arrays keep the batch in cache. Invalid rows get 0.5.
+    """
+    points_for = np.asarray(points_for, dtype=np.float32)
+    points_against = np.asarray(points_against, dtype=np.float32)
+    valid = (points_for > 0) & (points_against > 0)
+    ratio = np.divide(points_against, points_for, out=np.ones_like(points_for), where=valid)
+    expected = np.float32(1.0) / (np.float32(1.0) + ratio ** np.float32(exponent))
+    return np.where(valid, expected, np.float32(0.5))
+
 def calculate_luck_factor(actual_win_pct: float, pythagorean_win_pct: float) -> float:
     """
     Calculate how much a team is over/under-performing their Pythagorean expectation.
@@ -395,6 +445,15 @@ def calculate_luck_factor(actual_win_pct: float, pythagorean_win_pct: float) ->
     """
     return actual_win_pct - pythagorean_win_pct
 
+@lru_cache(maxsize=1024)
+def _split_record(record) -> tuple:
+    """Parse a "wins-losses" record into ints, or None if malformed."""
+    try:
+        wins, losses = map(int, record.split('-'))
+    except (ValueError, AttributeError):
+        return None
+    return wins, losses
+
 def calculate_road_warrior_bonus(team_rating: dict) -> float:
     """
     Calculate road warrior bonus for teams that perform better on the road.
@@ -404,16 +463,14 @@ def calculate_road_warrior_bonus(team_rating: dict) -> float:
 
     Returns bonus in rating points (0-3 range).
     """
-    home_record = team_rating.get('home_record', '0-0')
-    away_record = team_rating.get('away_record', '0-0')
-
-    # Parse records: "wins-losses"
-    try:
-        home_wins, home_losses = map(int, home_record.split('-'))
-        away_wins, away_losses = map(int, away_record.split('-'))
-    except (ValueError, AttributeError):
+    home_split = _split_record(team_rating.get('home_record', '0-0'))
+    away_split = _split_record(team_rating.get('away_record', '0-0'))
+    if home_split is None or away_split is None:
         return 0.0
 
+    home_wins, home_losses = home_split
+    away_wins, away_losses = away_split
+
     home_games = home_wins + home_losses
     away_games = away_wins + away_losses
 
@@ -466,19 +523,8 @@ def apply_pace_adjustment(points_per_game: float, opponent_points_per_game: floa
 
     return offensive_rating_per_100, defensive_rating_per_100
 
-def calculate_team_ratings(games: list, min_games: int = 5, use_sos_adjustment: bool = True) -> list:
-    """
-    Calculate team ratings with Phase 2.5 enhancements:
-    1. FIXED: Opponent-adjusted team-specific HCA (0-5 range)
-    2. Neutral court handling
-    3. Venue performance tracking
-    4. Variance metrics (for confidence, not rankings)
-    """
-    print('\nCalculating team ratings with Phase 2.5 enhancements...')
-    print('(Filtering teams with <5 games to exclude non-D1 opponents)')
-    
-    # Gather basic stats
-    team_stats = defaultdict(lambda: {
+def _empty_team_stats() -> dict:
+    return {
         'points_for': [],
         'points_against': [],
         'games': 0,
@@ -487,32 +533,14 @@ def calculate_team_ratings(games: list, min_games: int = 5, use_sos_adjustment:
         'team_name': 'Unknown',
         'team_abbr': '',
         'opponents': []
-    })
-
-    kenpom_collector = DataCollector()
-    kenpom_ratings = kenpom_collector.get_kenpom_ratings()
-    if not kenpom_ratings:
-        print('  ⚠️  KenPom ratings not found; skipping KenPom blending')
-    
-    kenpom_defaults = {
-        'adj_em': float(config.KENPOM_DEFAULT_ADJ_EM),
-        'adj_o': float(config.KENPOM_DEFAULT_ADJ_O),
-        'adj_d': float(config.KENPOM_DEFAULT_ADJ_D),
-        'adj_t': float(config.KENPOM_DEFAULT_ADJ_T)
     }
-    
-    def _is_default_kenpom(kp_rating: dict) -> bool:
-        return (
-            kp_rating.get('adj_em') == kenpom_defaults['adj_em'] and
-            kp_rating.get('adj_o') == kenpom_defaults['adj_o'] and
-            kp_rating.get('adj_d') == kenpom_defaults['adj_d'] and
-            kp_rating.get('adj_t') == kenpom_defaults['adj_t']
-        )
-    
+
+def _accumulate_team_stats(games: list, state: dict):
+    """Fold games into the running per-team stats and neutral-site counters in state."""
+    team_stats = state['team_stats']
     # Track neutral games for debugging
-    neutral_games_count = 0
-    neutral_game_examples = []
-    all_game_locations = set()  # Track all unique locations for analysis
+    neutral_game_examples = state['neutral_game_examples']
+    all_game_locations = state['all_game_locations']
 
     for game in games:
         home_id = game.get('HomeTeamID')
@@ -528,9 +556,8 @@ def calculate_team_ratings(games: list, min_games: int = 5, use_sos_adjustment:
         if not all([home_id, away_id, home_score is not None, away_score is not None, game_date_str]):
             continue
 
-        try:
-            game_date = datetime.fromisoformat(game_date_str.replace('Z', '+00:00'))
-        except:
+        game_date = _parse_game_date(game_date_str)
+        if game_date is None:
             continue
 
         is_neutral = is_neutral_court_game(game)
@@ -550,7 +577,7 @@ def calculate_team_ratings(games: list, min_games: int = 5, use_sos_adjustment:
 
         # Track neutral games
         if is_neutral:
-            neutral_games_count += 1
+            state['neutral_games_count'] += 1
             if len(neutral_game_examples) < 5:  # Keep first 5 examples
                 neutral_game_examples.append(f"{away_name} vs {home_name} ({game.get('location', 'Unknown')})")
         
@@ -579,6 +606,60 @@ def calculate_team_ratings(games: list, min_games: int = 5, use_sos_adjustment:
             team_stats[away_id]['wins'] += 1
         else:
             team_stats[away_id]['losses'] += 1
+
+def calculate_team_ratings(games: list, min_games: int = 5, use_sos_adjustment: bool = True,
+                           state: dict = None) -> list:
+    """
+    Calculate team ratings with Phase 2.5 enhancements:
+    1. FIXED: Opponent-adjusted team-specific HCA (0-5 range)
+    2. Neutral court handling
+    3. Venue performance tracking
+    4. Variance metrics (for confidence, not rankings)
+
+    For repeated calls over a growing season (e.g. a weekly backtest), pass the
+    same state dict every time (start with {}) and only the games added since
+    the previous call. Per-game aggregation and array packing then cover just
+    the new games; the rating passes still run over the whole accumulated set.
+    """
+    print('\nCalculating team ratings with Phase 2.5 enhancements...')
+    print('(Filtering teams with <5 games to exclude non-D1 opponents)')
+    
+    if state is None:
+        state = {}
+    if not state:
+        state.update(
+            team_stats=defaultdict(_empty_team_stats),
+            game_arrays=None,
+            neutral_games_count=0,
+            neutral_game_examples=[],
+            all_game_locations=set(),  # Track all unique locations for analysis
+        )
+    _accumulate_team_stats(games, state)
+    team_stats = state['team_stats']
+
+    new_arrays = games_to_arrays(games)
+    game_arrays = new_arrays if state['game_arrays'] is None else state['game_arrays'].extend(new_arrays)
+    state['game_arrays'] = game_arrays
+
+    kenpom_collector = DataCollector()
+    kenpom_ratings = kenpom_collector.get_kenpom_ratings()
+    if not kenpom_ratings:
+        print('  ⚠️  KenPom ratings not found; skipping KenPom blending')
+    
+    kenpom_defaults = {
+        'adj_em': float(config.KENPOM_DEFAULT_ADJ_EM),
+        'adj_o': float(config.KENPOM_DEFAULT_ADJ_O),
+        'adj_d': float(config.KENPOM_DEFAULT_ADJ_D),
+        'adj_t': float(config.KENPOM_DEFAULT_ADJ_T)
+    }
+    
+    def _is_default_kenpom(kp_rating: dict) -> bool:
+        return (
+            kp_rating.get('adj_em') == kenpom_defaults['adj_em'] and
+            kp_rating.get('adj_o') == kenpom_defaults['adj_o'] and
+            kp_rating.get('adj_d') == kenpom_defaults['adj_d'] and
+            kp_rating.get('adj_t') == kenpom_defaults['adj_t']
+        )
     
     # Filter qualified teams
     qualified_teams = {team_id: stats for team_id, stats in team_stats.items() 
@@ -614,6 +695,13 @@ def calculate_team_ratings(games: list, min_games: int = 5, use_sos_adjustment:
     # Calculate enhanced metrics with opponent-adjusted HCA
     print(f'  Calculating enhanced metrics with FIXED HCA calculation...')
     ratings_dict = {}
+    pythagorean_win_pcts = dict(zip(
+        qualified_teams,
+        calculate_pythagorean_expectations(
+            [np.mean(stats['points_for']) for stats in qualified_teams.values()],
+            [np.mean(stats['points_against']) for stats in qualified_teams.values()],
+        ).tolist()
+    ))
     
     for team_id, stats in qualified_teams.items():
         raw_offensive = np.mean(stats['points_for'])
@@ -642,14 +730,14 @@ def calculate_team_ratings(games: list, min_games: int = 5, use_sos_adjustment:
 
         # Phase 3D: Pythagorean expectation and luck analysis
         actual_win_pct = stats['wins'] / stats['games'] if stats['games'] > 0 else 0
-        pythagorean_win_pct = calculate_pythagorean_expectation(raw_offensive, raw_defensive)
+        pythagorean_win_pct = pythagorean_win_pcts[team_id]
         luck_factor = calculate_luck_factor(actual_win_pct, pythagorean_win_pct)
 
         # Phase 2.5: FIXED opponent-adjusted HCA
-        hca_data = calculate_team_specific_hca_v2(team_id, games, initial_ratings)
+        hca_data = calculate_team_specific_hca_v2(team_id, games, initial_ratings, game_arrays)
         
         # Variance metrics
-        variance_data = calculate_variance_metrics(team_id, games)
+        variance_data = calculate_variance_metrics(team_id, games, game_arrays)
         
         ratings_dict[team_id] = {
             'team_id': team_id,
@@ -662,7 +750,7 @@ def calculate_team_ratings(games: list, min_games: int = 5, use_sos_adjustment:
             'losses': stats['losses'],
             'games': stats['games'],
             'win_pct': stats['wins'] / stats['games'] if stats['games'] > 0 else 0,
-            'opponents': stats['opponents'],
+            'opponents': list(stats['opponents']),
             'kenpom_adj_em': kenpom_adj_em,
             'kenpom_adj_o': kenpom_adj_o,
             'kenpom_adj_d': kenpom_adj_d,
@@ -732,121 +820,101 @@ def calculate_team_ratings(games: list, min_games: int = 5, use_sos_adjustment:
 
     # Return both ratings and neutral game statistics
     return sorted_ratings, {
-        'neutral_games_count': neutral_games_count,
-        'neutral_game_examples': neutral_game_examples,
-        'all_game_locations': sorted(list(all_game_locations))[:20]  # Top 20 locations for debugging
+        'neutral_games_count': state['neutral_games_count'],
+        'neutral_game_examples': state['neutral_game_examples'],
+        'all_game_locations': sorted(list(state['all_game_locations']))[:20]  # Top 20 locations for debugging
     }
 
 def _apply_sos_adjustment_v3(ratings_dict: dict, team_stats: dict, iterations: int = 10) -> dict:
     """
     SOS adjustment with Phase 2.5: Using FIXED opponent-adjusted HCA
+
+    Every (team, opponent) game is flattened into parallel arrays once, so each
+    iteration is a handful of vectorized gathers plus a weighted np.bincount
+    per team instead of a Python loop over every team's schedule.
     """
+    league_avg = 75.0
+
     # Start with raw ratings
     for team_id in ratings_dict:
         ratings_dict[team_id]['raw_off'] = ratings_dict[team_id]['offensive_rating']
         ratings_dict[team_id]['raw_def'] = ratings_dict[team_id]['defensive_rating']
     
-    # Calculate recency weights for each team
-    recency_weights_by_team = {}
+    team_ids = list(ratings_dict)
+    team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+    n_teams = len(team_ids)
+
+    # Flatten games against rated opponents, with their recency and Margin of Victory
+    # weights (neither changes between iterations)
+    team_idx, opp_idx, our_scores, opp_scores, is_home_flags = [], [], [], [], []
+    off_weights, def_weights = [], []
     for team_id, rating in ratings_dict.items():
         opponents = rating['opponents']
-        game_dates = [opp[4] for opp in opponents]
-        recency_weights_by_team[team_id] = calculate_recency_weights(game_dates)
-    
+        recency_weights = calculate_recency_weights([opp[4] for opp in opponents])
+        margins = np.array([our_score - opp_score for _, opp_score, our_score, _, _ in opponents], dtype=float)
+        off_mov_weights = np.clip(1.0 + adjust_margins(margins) / 100.0, 0.8, 1.3)
+        def_mov_weights = np.clip(1.0 - adjust_margins(-margins) / 100.0, 0.8, 1.3)
+
+        for idx, (opp_id, opp_score, our_score, is_home, game_date) in enumerate(opponents):
+            if opp_id in team_index:
+                team_idx.append(team_index[team_id])
+                opp_idx.append(team_index[opp_id])
+                our_scores.append(our_score)
+                opp_scores.append(opp_score)
+                is_home_flags.append(is_home)
+                off_weights.append(off_mov_weights[idx] * recency_weights[idx])
+                def_weights.append(def_mov_weights[idx] * recency_weights[idx])
+
+    team_idx = np.array(team_idx, dtype=np.intp)
+    opp_idx = np.array(opp_idx, dtype=np.intp)
+    our_scores = np.array(our_scores, dtype=float)
+    opp_scores = np.array(opp_scores, dtype=float)
+    is_home_flags = np.array(is_home_flags, dtype=bool)
+    off_weights = np.array(off_weights, dtype=float)
+    def_weights = np.array(def_weights, dtype=float)
+
+    offensive = np.array([ratings_dict[t]['offensive_rating'] for t in team_ids], dtype=float)
+    defensive = np.array([ratings_dict[t]['defensive_rating'] for t in team_ids], dtype=float)
+    hca = np.array([ratings_dict[t]['hca'] for t in team_ids], dtype=float)  # FIXED team-specific HCA
+
+    # Teams without rated opponents keep their current ratings
+    off_weight_sums = np.bincount(team_idx, weights=off_weights, minlength=n_teams)
+    def_weight_sums = np.bincount(team_idx, weights=def_weights, minlength=n_teams)
+    has_off = off_weight_sums > 0
+    has_def = def_weight_sums > 0
+    off_weight_sums[~has_off] = 1.0
+    def_weight_sums[~has_def] = 1.0
+
     # Iteratively adjust ratings
     for iteration in range(iterations):
-        new_ratings = {}
-        
-        for team_id, rating in ratings_dict.items():
-            opponents = rating['opponents']
-            recency_weights = recency_weights_by_team[team_id]
-            team_hca = rating['hca']  # Use FIXED team-specific HCA
-            
-            # Adjust offensive rating
-            adj_off_values = []
-            weights = []
-            
-            for idx, (opp_id, opp_score, our_score, is_home, game_date) in enumerate(opponents):
-                if opp_id in ratings_dict:
-                    league_avg_def = 75.0
-                    opp_def = ratings_dict[opp_id]['defensive_rating']
-                    opp_hca = ratings_dict[opp_id]['hca']  # Opponent's FIXED HCA
-                    
-                    # Use team-specific HCA for both teams
-                    if is_home:
-                        effective_opp_def = opp_def - team_hca
-                    else:
-                        effective_opp_def = opp_def + opp_hca
-                    
-                    effective_opp_def = max(effective_opp_def, 30.0)
-                    
-                    adjustment = league_avg_def / effective_opp_def
-                    
-                    # Margin of Victory
-                    margin = our_score - opp_score
-                    adjusted_margin = calculate_adjusted_margin(margin)
-                    mov_weight = 1.0 + (adjusted_margin / 100.0)
-                    mov_weight = max(0.8, min(1.3, mov_weight))
-                    
-                    # Recency Weight
-                    recency_weight = recency_weights[idx] if idx < len(recency_weights) else 1.0
-                    
-                    # Combined weight
-                    total_weight = mov_weight * recency_weight
-                    
-                    adj_off_values.append(our_score * adjustment)
-                    weights.append(total_weight)
-            
-            # Weighted average
-            if adj_off_values and sum(weights) > 0:
-                new_ratings[team_id] = {
-                    'offensive_rating': np.average(adj_off_values, weights=weights)
-                }
-            else:
-                new_ratings[team_id] = {
-                    'offensive_rating': rating['offensive_rating']
-                }
-            
-            # Adjust defensive rating (similar logic)
-            adj_def_values = []
-            weights = []
-            
-            for idx, (opp_id, opp_score, our_score, is_home, game_date) in enumerate(opponents):
-                if opp_id in ratings_dict:
-                    league_avg_off = 75.0
-                    opp_off = ratings_dict[opp_id]['offensive_rating']
-                    opp_hca = ratings_dict[opp_id]['hca']
-                    
-                    if is_home:
-                        effective_opp_off = opp_off - opp_hca
-                    else:
-                        effective_opp_off = opp_off + opp_hca
-                    
-                    effective_opp_off = max(effective_opp_off, 30.0)
-                    
-                    adjustment = league_avg_off / effective_opp_off
-                    
-                    margin = opp_score - our_score
-                    adjusted_margin = calculate_adjusted_margin(margin)
-                    mov_weight = 1.0 - (adjusted_margin / 100.0)
-                    mov_weight = max(0.8, min(1.3, mov_weight))
-                    
-                    recency_weight = recency_weights[idx] if idx < len(recency_weights) else 1.0
-                    total_weight = mov_weight * recency_weight
-                    
-                    adj_def_values.append(opp_score * adjustment)
-                    weights.append(total_weight)
-            
-            if adj_def_values and sum(weights) > 0:
-                new_ratings[team_id]['defensive_rating'] = np.average(adj_def_values, weights=weights)
-            else:
-                new_ratings[team_id]['defensive_rating'] = rating['defensive_rating']
-        
-        # Update ratings
-        for team_id in ratings_dict:
-            if team_id in new_ratings:
-                ratings_dict[team_id]['offensive_rating'] = new_ratings[team_id]['offensive_rating']
-                ratings_dict[team_id]['defensive_rating'] = new_ratings[team_id]['defensive_rating']
+        # Adjust offensive rating using team-specific HCA for both teams
+        effective_opp_def = np.where(
+            is_home_flags,
+            defensive[opp_idx] - hca[team_idx],
+            defensive[opp_idx] + hca[opp_idx]
+        )
+        effective_opp_def = np.maximum(effective_opp_def, 30.0)
+        adj_off_values = our_scores * (league_avg / effective_opp_def)
+
+        # Adjust defensive rating (similar logic)
+        effective_opp_off = np.where(
+            is_home_flags,
+            offensive[opp_idx] - hca[opp_idx],
+            offensive[opp_idx] + hca[opp_idx]
+        )
+        effective_opp_off = np.maximum(effective_opp_off, 30.0)
+        adj_def_values = opp_scores * (league_avg / effective_opp_off)
+
+        # Weighted averages per team
+        new_offensive = np.bincount(team_idx, weights=off_weights * adj_off_values, minlength=n_teams) / off_weight_sums
+        new_defensive = np.bincount(team_idx, weights=def_weights * adj_def_values, minlength=n_teams) / def_weight_sums
+        offensive = np.where(has_off, new_offensive, offensive)
+        defensive = np.where(has_def, new_defensive, defensive)
+    
+    # Update ratings
+    for i, team_id in enumerate(team_ids):
+        ratings_dict[team_id]['offensive_rating'] = offensive[i]
+        ratings_dict[team_id]['defensive_rating'] = defensive[i]
     
     return ratings_dict
 
@@ -158,10 +158,16 @@ class Predictor:
             for key in defaults
         }
     
-    def predict_game(self, game: Dict) -> Dict:
+    def predict_game(self, game: Dict,
+                     team_ratings: Optional[Dict[int, float]] = None) -> Dict:
         """
         Predict outcome for a game.
         
+        Args:
+            game: Game dictionary
+            team_ratings: Precomputed team ratings for SOS calculation
+                (computed from the current UKF states if omitted)
+        
         Returns dictionary with predictions and confidence scores.
         """
         home_team_id = self._get_team_id(game, 'HomeTeam', 'HomeTeamID')
@@ -179,7 +185,8 @@ class Predictor:
         game_date = datetime.now()
 
         # Get current team ratings for SOS calculation
-        team_ratings = self.ukf.get_all_team_ratings()
+        if team_ratings is None:
+            team_ratings = self.ukf.get_all_team_ratings()
 
         home_features = self.calculator.get_game_features(
             game, home_team_id, is_home=True,
@@ -419,7 +426,8 @@ class Predictor:
     def get_team_ratings(self) -> Dict[int, Dict]:
         """Get current ratings for all teams."""
         ratings = {}
-        for team_id, state in self.ukf.get_all_states().items():
+        team_ids, states = self.ukf.all_states_array()
+        for team_id, state in zip(team_ids, states.tolist()):
             ratings[team_id] = {
                 'offensive_rating': float(state[TeamUKF.OFF_RATING]),
                 'defensive_rating': float(state[TeamUKF.DEF_RATING]),
@@ -442,9 +450,12 @@ class Predictor:
         if not self.initialized:
             self.initialize()
         
+        # Team states don't change while predicting, so compute ratings once per batch
+        team_ratings = self.ukf.get_all_team_ratings()
+        
         results = []
         for game in games:
-            prediction = self.predict_game(game)
+            prediction = self.predict_game(game, team_ratings=team_ratings)
             results.append({
                 'game': game,
                 'prediction': prediction
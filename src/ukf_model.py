@@ -10,9 +10,30 @@ from scipy.linalg import block_diag
 import config
 
 
+class BatchedUKF(UKF):
+    """
+    filterpy UKF that passes all sigma points through fx in a single call.
+
+    filterpy evaluates the process model once per sigma point (15 Python calls
+    for a 7-dim state). TeamUKF's process model indexes the state with
+    x[..., i], so the whole (2n+1, n) sigma point array goes through one NumPy
+    pass instead. update() is filterpy's own.
+    """
+    
+    def compute_process_sigmas(self, dt, fx=None, **fx_args):
+        if fx is None:
+            fx = self.fx
+        
+        sigmas = self.points_fn.sigma_points(self.x, self.P)
+        self.sigmas_f = fx(sigmas, dt, **fx_args)
+
+
 class TeamUKF:
     """UKF for tracking a single team's state."""
     
+    # One instance per team (hundreds in a full D1 season); no per-instance __dict__
+    __slots__ = ('team_id', 'state', 'ukf')
+    
     # State indices
     OFF_RATING = 0
     DEF_RATING = 1
@@ -71,9 +92,9 @@ class TeamUKF:
         points = MerweScaledSigmaPoints(n=self.STATE_DIM, alpha=0.001, beta=2, kappa=0)
         
         # Create UKF
-        self.ukf = UKF(dim_x=self.STATE_DIM, dim_z=3, dt=1.0, 
-                       fx=self._process_model, hx=self._measurement_model,
-                       points=points)
+        self.ukf = BatchedUKF(dim_x=self.STATE_DIM, dim_z=3, dt=1.0, 
+                              fx=self._process_model, hx=self._measurement_model,
+                              points=points)
         
         self.ukf.x = self.state.copy()
         self.ukf.P = P
@@ -84,6 +105,8 @@ class TeamUKF:
         """
         Process model: how state evolves over time.
         Most components follow random walk, but some have specific dynamics.
+        
+        x may be a single state or a (n_sigmas, STATE_DIM) array of sigma points.
         """
         x_new = x.copy()
         
@@ -95,21 +118,21 @@ class TeamUKF:
         # Health: can change quickly (handled by Q)
         
         # Momentum: exponential decay
-        x_new[self.MOMENTUM] *= config.MOMENTUM_DECAY
+        x_new[..., self.MOMENTUM] *= config.MOMENTUM_DECAY
         
         # Fatigue: decays with time (if no new games)
-        x_new[self.FATIGUE] *= 0.95  # Slight decay per time step
+        x_new[..., self.FATIGUE] *= 0.95  # Slight decay per time step
         
         # Pace: relatively stable (random walk in Q)
         
         # Clamp values to reasonable ranges
-        x_new[self.OFF_RATING] = np.clip(x_new[self.OFF_RATING], 50, 150)
-        x_new[self.DEF_RATING] = np.clip(x_new[self.DEF_RATING], 50, 150)
-        x_new[self.HOME_ADV] = np.clip(x_new[self.HOME_ADV], 0, 10)
-        x_new[self.HEALTH] = np.clip(x_new[self.HEALTH], 0, 1)
-        x_new[self.MOMENTUM] = np.clip(x_new[self.MOMENTUM], -1, 1)
-        x_new[self.FATIGUE] = np.clip(x_new[self.FATIGUE], 0, 1)
-        x_new[self.PACE] = np.clip(x_new[self.PACE], 60, 80)
+        x_new[..., self.OFF_RATING] = np.clip(x_new[..., self.OFF_RATING], 50, 150)
+        x_new[..., self.DEF_RATING] = np.clip(x_new[..., self.DEF_RATING], 50, 150)
+        x_new[..., self.HOME_ADV] = np.clip(x_new[..., self.HOME_ADV], 0, 10)
+        x_new[..., self.HEALTH] = np.clip(x_new[..., self.HEALTH], 0, 1)
+        x_new[..., self.MOMENTUM] = np.clip(x_new[..., self.MOMENTUM], -1, 1)
+        x_new[..., self.FATIGUE] = np.clip(x_new[..., self.FATIGUE], 0, 1)
+        x_new[..., self.PACE] = np.clip(x_new[..., self.PACE], 60, 80)
         
         return x_new
     
@@ -122,7 +145,8 @@ class TeamUKF:
         """
         # This is a placeholder - actual measurement requires opponent state
         # For now, return zeros (will be updated in game context)
-        return np.array([0.0, 0.0, x[self.PACE]])
+        pace = x[..., self.PACE]
+        return np.stack([np.zeros_like(pace), np.zeros_like(pace), pace], axis=-1)
     
     def predict(self):
         """Predict state forward one time step."""
@@ -215,16 +239,16 @@ class TeamUKF:
     
     def _measurement_model_with_opponent(self, x: np.ndarray, opponent_state: np.ndarray,
                                         is_home: bool, features: Dict) -> np.ndarray:
-        """Measurement model that includes opponent state."""
+        """Measurement model that includes opponent state (single state or sigma point array)."""
         opp_off = opponent_state[TeamUKF.OFF_RATING]
         opp_def = opponent_state[TeamUKF.DEF_RATING]
-        our_off = x[self.OFF_RATING]
-        our_def = x[self.DEF_RATING]
+        our_off = x[..., self.OFF_RATING]
+        our_def = x[..., self.DEF_RATING]
         
         # Expected score differential
         expected_diff = (our_off - opp_def) - (opp_off - our_def)
         if is_home:
-            expected_diff += x[self.HOME_ADV]
+            expected_diff = expected_diff + x[..., self.HOME_ADV]
         
         # Apply feature impacts
         health_impact = (features.get('health_status', 1.0) - 1.0) * 5.0
@@ -235,13 +259,13 @@ class TeamUKF:
         
         # Expected total - use same formula as predictor
         # Expected score = (team_offense - opponent_defense + baseline) * pace
-        pace = max(60.0, min(80.0, x[self.PACE]))
+        pace = np.clip(x[..., self.PACE], 60.0, 80.0)
         our_expected = ((our_off - opp_def + 100.0) / 100.0) * pace
         opp_expected = ((opp_off - our_def + 100.0) / 100.0) * pace
         expected_total = our_expected + opp_expected
-        expected_total *= features.get('health_status', 1.0)
+        expected_total = expected_total * features.get('health_status', 1.0)
         
-        return np.array([expected_diff, expected_total, pace])
+        return np.stack([expected_diff, expected_total, pace], axis=-1)
     
     def get_state(self) -> np.ndarray:
         """Get current state estimate."""
@@ -297,6 +321,19 @@ class MultiTeamUKF:
         """Get current state for a team."""
         return self.get_team_ukf(team_id).get_state()
     
+    def all_states_array(self) -> Tuple[List[int], np.ndarray]:
+        """
+        Get all team states stacked into one array.
+
+        Returns:
+            (team_ids, states) where states is a read-only (teams, STATE_DIM)
+            array whose rows follow team_ids
+        """
+        team_ids = list(self.teams)
+        states = np.array([ukf.state for ukf in self.teams.values()]).reshape(-1, TeamUKF.STATE_DIM)
+        states.flags.writeable = False
+        return team_ids, states
+    
     def get_all_states(self) -> Dict[int, np.ndarray]:
         """Get states for all teams."""
         return {team_id: ukf.get_state() for team_id, ukf in self.teams.items()}
@@ -308,11 +345,8 @@ class MultiTeamUKF:
         Returns:
             Dict mapping team_id to rating (higher is better)
         """
-        ratings = {}
-        for team_id, ukf in self.teams.items():
-            state = ukf.get_state()
-            # Rating = offensive - defensive (higher is better)
-            rating = state[TeamUKF.OFF_RATING] - state[TeamUKF.DEF_RATING]
-            ratings[team_id] = float(rating)
-        return ratings
+        team_ids, states = self.all_states_array()
+        # Rating = offensive - defensive (higher is better)
+        ratings = states[:, TeamUKF.OFF_RATING] - states[:, TeamUKF.DEF_RATING]
+        return dict(zip(team_ids, ratings.tolist()))
 
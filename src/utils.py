@@ -1,9 +1,20 @@
 """
 Shared utility helpers.
 """
+from functools import lru_cache
 from typing import Optional, Any, Dict
 
 
+@lru_cache(maxsize=4096)
+def _normalize_team_name(name: str) -> int:
+    """Convert a string team identifier to an integer ID (cached per name)."""
+    try:
+        return int(name)
+    except ValueError:
+        # Use hash for string names
+        return abs(hash(name)) % 100000
+
+
 def normalize_team_id(team_id_or_name: Optional[Any]) -> Optional[int]:
     """Normalize team identifier to integer ID."""
     if team_id_or_name is None:
@@ -13,11 +24,7 @@ def normalize_team_id(team_id_or_name: Optional[Any]) -> Optional[int]:
         return team_id_or_name
 
     if isinstance(team_id_or_name, str):
-        try:
-            return int(team_id_or_name)
-        except ValueError:
-            # Use hash for string names
-            return abs(hash(team_id_or_name)) % 100000
+        return _normalize_team_name(team_id_or_name)
 
     return None
 
@@ -6,34 +6,54 @@ import sys
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List
+from unittest.mock import DEFAULT, MagicMock, patch
 import numpy as np
 import config
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Canned return values for the mocked Predictor dependencies
+MOCK_KENPOM_RATING = {
+    'adj_em': 0.0,
+    'adj_o': 100.0,
+    'adj_d': 100.0,
+    'adj_t': 70.0
+}
+
+MOCK_GAME_FEATURES = {
+    'momentum': 0.1,
+    'fatigue': 0.1,
+    'health_status': 1.0,
+    'home_advantage': 3.0,
+    'pace': 70.0
+}
+
+# Completed game backing the sample_game and sample_prediction fixtures
+SAMPLE_GAME = {
+    'GameID': 12345,
+    'DateTime': '2026-01-15T19:00:00Z',
+    'Season': 2026,
+    'SeasonType': 1,
+    'Status': 'Final',
+    'HomeTeamID': 1234,
+    'AwayTeamID': 5678,
+    'HomeTeam': 'DUKE',
+    'AwayTeam': 'UNC',
+    'HomeTeamName': 'Duke Blue Devils',
+    'AwayTeamName': 'North Carolina Tar Heels',
+    'HomeTeamScore': 78,
+    'AwayTeamScore': 72,
+    'PointSpread': -5.5,
+    'OverUnder': 145.0,
+    'IsClosed': True,
+}
+
 
 @pytest.fixture
 def sample_game() -> Dict:
     """Create a sample game dictionary for testing."""
-    return {
-        'GameID': 12345,
-        'DateTime': '2026-01-15T19:00:00Z',
-        'Season': 2026,
-        'SeasonType': 1,
-        'Status': 'Final',
-        'HomeTeamID': 1234,
-        'AwayTeamID': 5678,
-        'HomeTeam': 'DUKE',
-        'AwayTeam': 'UNC',
-        'HomeTeamName': 'Duke Blue Devils',
-        'AwayTeamName': 'North Carolina Tar Heels',
-        'HomeTeamScore': 78,
-        'AwayTeamScore': 72,
-        'PointSpread': -5.5,
-        'OverUnder': 145.0,
-        'IsClosed': True,
-    }
+    return dict(SAMPLE_GAME)
 
 
 @pytest.fixture
@@ -169,3 +189,45 @@ def sample_training_data():
     
     return X, y
 
+
+
+@pytest.fixture(scope="module")
+def _patch_predictor_deps():
+    """Patch the Predictor's data dependencies for the duration of a test module."""
+    from src.data_collector import DataCollector
+    from src.feature_calculator import FeatureCalculator
+
+    # Prebuilt spec'd instances so return values are configured once per module
+    collector = MagicMock(spec=DataCollector)
+    collector.get_completed_games.return_value = []
+    collector.get_kenpom_team_rating.return_value = MOCK_KENPOM_RATING
+
+    calculator = MagicMock(spec=FeatureCalculator)
+    calculator.get_game_features.return_value = MOCK_GAME_FEATURES
+
+    with patch.multiple('src.predictor', DataCollector=DEFAULT, FeatureCalculator=DEFAULT) as mocks:
+        mocks['DataCollector'].return_value = collector
+        mocks['FeatureCalculator'].return_value = calculator
+        yield mocks
+
+
+@pytest.fixture(scope="module")
+def predictor(_patch_predictor_deps):
+    """Create a Predictor with mocked dependencies, shared across a test module."""
+    from src.predictor import Predictor
+
+    return Predictor()
+
+
+@pytest.fixture
+def initialized_predictor(predictor):
+    """Shared Predictor flagged as initialized for the duration of one test."""
+    predictor.initialized = True
+    yield predictor
+    predictor.initialized = False
+
+
+@pytest.fixture(scope="module")
+def sample_prediction(predictor) -> Dict:
+    """Prediction for SAMPLE_GAME, computed once per module."""
+    return predictor.predict_game(dict(SAMPLE_GAME))
@@ -139,7 +139,7 @@ class TestModelPrediction:
         X = np.random.randn(10, config.ML_FEATURE_COUNT).astype(np.float32)
         predictions = trained_model.predict(X)
         
-        assert np.all(np.isfinite(predictions))
+        assert np.isfinite(predictions).all()
     
     @pytest.mark.unit
     def test_predict_margin_reasonable_range(self, trained_model):
@@ -413,7 +413,7 @@ class TestModelEdgeCases:
         model.train(X, y, epochs=2, verbose=0)
         
         predictions = model.predict(X[:5])
-        assert np.all(np.isfinite(predictions))
+        assert np.isfinite(predictions).all()
     
     @pytest.mark.unit
     def test_model_with_high_dropout(self, sample_training_data):
@@ -424,5 +424,5 @@ class TestModelEdgeCases:
         model.train(X, y, epochs=2, verbose=0)
         
         predictions = model.predict(X[:5])
-        assert np.all(np.isfinite(predictions))
+        assert np.isfinite(predictions).all()
 
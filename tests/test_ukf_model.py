@@ -265,6 +265,26 @@ class TestMultiTeamUKF:
         assert 1 in all_states
         assert 2 in all_states
         assert 3 in all_states
+        
+        # Returned states are copies the caller may modify
+        all_states[1][TeamUKF.OFF_RATING] = 0.0
+        assert multi_ukf.get_team_state(1)[TeamUKF.OFF_RATING] == 100.0
+    
+    @pytest.mark.unit
+    def test_all_states_array(self):
+        """Test the stacked state array lines up with get_all_states."""
+        multi_ukf = MultiTeamUKF()
+        for team_id in (3, 1, 2):
+            multi_ukf.get_team_ukf(team_id)
+        
+        team_ids, states = multi_ukf.all_states_array()
+        
+        assert team_ids == [3, 1, 2]
+        assert states.shape == (3, TeamUKF.STATE_DIM)
+        assert not states.flags.writeable
+        all_states = multi_ukf.get_all_states()
+        for row, team_id in enumerate(team_ids):
+            np.testing.assert_array_equal(states[row], all_states[team_id])
     
     @pytest.mark.unit
     def test_update_from_game(self, sample_features):
@@ -0,0 +1,61 @@
+"""
+Vectorized game scoring shared by the validation backtests.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+# One row per scored game (both teams rated), home team perspective
+SCORE_DTYPE = np.dtype([
+    ('game', np.intp),               # index into the test games
+    ('home', np.intp),               # home team's row in the ratings array
+    ('away', np.intp),               # away team's row in the ratings array
+    ('predicted_margin', np.float64),
+    ('actual_margin', np.int16),
+    ('correct', np.bool_),
+    ('margin_error', np.float64),
+])
+
+
+def score_games(test_games: List[Dict], ratings_arr: np.ndarray, id_to_idx: Dict) -> np.ndarray:
+    """
+    Predict every test game from the team ratings at once.
+
+    Games where either team has no rating are skipped. The predicted margin
+    is home rating minus away rating; a prediction is correct when it has
+    the same sign (home win or not) as the actual margin.
+
+    Args:
+        test_games: Games to predict (need team IDs and scores)
+        ratings_arr: Overall rating per team row (float64)
+        id_to_idx: team_id -> row in ratings_arr
+
+    Returns:
+        SCORE_DTYPE array with one record per scored game, in test_games order
+    """
+    n = len(test_games)
+
+    # Rows of both teams in the ratings arrays (-1 = no rating); keep games where both are rated
+    home_idx = np.fromiter((id_to_idx.get(g.get('HomeTeamID'), -1) for g in test_games),
+                           dtype=np.intp, count=n)
+    away_idx = np.fromiter((id_to_idx.get(g.get('AwayTeamID'), -1) for g in test_games),
+                           dtype=np.intp, count=n)
+    game_idx = np.flatnonzero((home_idx >= 0) & (away_idx >= 0))
+
+    scores = np.empty(len(game_idx), dtype=SCORE_DTYPE)
+    scores['game'] = game_idx
+    scores['home'] = home_idx[game_idx]
+    scores['away'] = away_idx[game_idx]
+
+    scored = game_idx.tolist()
+    home_scores = np.array([test_games[i]['HomeTeamScore'] for i in scored], dtype=np.int16)
+    away_scores = np.array([test_games[i]['AwayTeamScore'] for i in scored], dtype=np.int16)
+
+    predicted_margins = ratings_arr[scores['home']] - ratings_arr[scores['away']]
+    actual_margins = home_scores - away_scores
+    scores['predicted_margin'] = predicted_margins
+    scores['actual_margin'] = actual_margins
+    scores['correct'] = (predicted_margins > 0) == (actual_margins > 0)
+    scores['margin_error'] = np.abs(predicted_margins - actual_margins)
+
+    return scores
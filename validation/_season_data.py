@@ -0,0 +1,204 @@
+"""
+Season game loading and weekly team ratings shared by the validation backtests.
+"""
+import contextlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from src.espn_collector import get_espn_collector
+
+# season -> (fetch day, games), so backtests run in one process (e.g. by
+# run_all_backtests) share a single load instead of re-reading the cache file
+_loaded_seasons: Dict[int, Tuple[date, List[Dict]]] = {}
+
+# Season games shared with pool workers (set once per worker by the initializer)
+_season_games: List[Dict] = []
+
+
+def cached_season_games(season: int) -> List[Dict]:
+    """
+    Get all games for a season from ESPN, cached on disk for the day.
+
+    The team-schedule crawl takes minutes, so back-to-back backtest runs
+    reuse today's fetch from config.CACHE_DIR instead of crawling again,
+    and later calls in the same process reuse the already-loaded list.
+
+    Args:
+        season: Season year (e.g., 2026)
+
+    Returns:
+        List of all unique games (a fresh list; the game dicts are shared)
+    """
+    loaded = _loaded_seasons.get(season)
+    if loaded and loaded[0] == date.today():
+        return list(loaded[1])
+
+    cache_path = os.path.join(config.CACHE_DIR, f"espn_season_games_{season}.json")
+
+    # Check cache (refresh daily)
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+            if datetime.fromisoformat(cached['timestamp']).date() == date.today():
+                _loaded_seasons[season] = (date.today(), cached['data'])
+                return list(cached['data'])
+        except (json.JSONDecodeError, ValueError, KeyError):
+            pass
+
+    games = get_espn_collector().get_all_games_via_team_schedules(season=season)
+
+    # Don't cache a failed (empty) crawl
+    if games:
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump({'timestamp': datetime.now().isoformat(), 'data': games}, f)
+        _loaded_seasons[season] = (date.today(), games)
+
+    return list(games)
+
+
+def _parse_utc(date_str: str) -> Optional[datetime]:
+    """Parse one ISO timestamp to a naive UTC datetime, or None if invalid."""
+    try:
+        parsed = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def game_datetimes(games: List[Dict]) -> np.ndarray:
+    """
+    Parse every game's 'DateTime' into one datetime64[s] array (UTC).
+
+    ESPN timestamps are UTC with a trailing 'Z'; stripping it lets NumPy
+    parse the whole column in one C pass. If any string is not plain ISO,
+    the column falls back to a per-game parse.
+
+    Returns:
+        Array aligned with games, NaT where the DateTime is missing or invalid
+    """
+    raw = np.array([g.get('DateTime') or '' for g in games], dtype=str)
+    try:
+        return np.char.rstrip(raw, 'Z').astype('datetime64[s]')
+    except ValueError:
+        return np.array([_parse_utc(s) for s in raw.tolist()], dtype='datetime64[s]')
+
+
+def week_codes(dates: np.ndarray) -> np.ndarray:
+    """
+    Sunday-start week of the year ('%Y-W%U') for each date, as year * 100 + week.
+
+    Codes never decrease as the date increases, so in date-sorted games each
+    week is one contiguous run.
+    """
+    days = dates.astype('datetime64[D]')
+    years = days.astype('datetime64[Y]')
+    day_of_year = (days - years.astype('datetime64[D]')).astype(np.int64)
+    weekday = (days.astype(np.int64) + 4) % 7  # 0 = Sunday (1970-01-01 was a Thursday)
+    return (years.astype(np.int64) + 1970) * 100 + (day_of_year + 7 - weekday) // 7
+
+
+def week_slices(dates: np.ndarray) -> List[Tuple[str, int, int]]:
+    """
+    Split date-sorted dates into their '%Y-W%U' weeks.
+
+    Each week is one contiguous run starting at its code's first occurrence,
+    so the weeks come back as slice bounds into dates (and the games sorted
+    with them).
+
+    Returns:
+        (week key, start, end) for each week, in date order
+    """
+    codes, week_starts = np.unique(week_codes(dates), return_index=True)
+    week_bounds = week_starts.tolist() + [len(dates)]
+    return [
+        (f"{code // 100}-W{code % 100:02d}", lo, hi)
+        for code, lo, hi in zip(codes.tolist(), week_bounds[:-1], week_bounds[1:])
+    ]
+
+
+def ratings_lookup(ratings_result) -> Tuple[Dict, np.ndarray]:
+    """Turn a calculate_team_ratings result into a team_id -> row map and a dense rating vector."""
+    # Handle both old format (list) and new format (tuple)
+    if isinstance(ratings_result, tuple):
+        ratings, _ = ratings_result
+    else:
+        ratings = ratings_result
+    # a falsy team_id never counts as rated
+    id_to_idx = {r['team_id']: i for i, r in enumerate(ratings) if r['team_id']}
+    overall = np.array([r['overall_rating'] for r in ratings], dtype=float)
+    return id_to_idx, overall
+
+
+def sequential_week_ratings(training_games: List[Dict], weeks: List[List[Dict]]):
+    """
+    Yield each week's ratings lookup (or the exception raised computing it).
+
+    One ratings state is carried across weeks, so each call only folds in the
+    games added since the previous week instead of re-aggregating the season.
+
+    Args:
+        training_games: Games before the first week
+        weeks: Each week's games, in date order
+    """
+    from show_team_ratings_v3 import calculate_team_ratings
+
+    ratings_state = {}
+    new_games = training_games
+    for week_games in weeks:
+        try:
+            yield ratings_lookup(calculate_team_ratings(new_games, min_games=5, use_sos_adjustment=True,
+                                                        state=ratings_state))
+        except Exception as e:
+            yield e
+        # Add this week's games to the training set for next week
+        new_games = week_games
+
+
+def _init_worker(games: List[Dict]):
+    """Pool initializer: ship the season's games to each worker once."""
+    global _season_games
+    _season_games = games
+
+
+def _week_ratings(n_games: int) -> Tuple[Dict, np.ndarray]:
+    """Pool task: ratings from the first n_games of the season (progress output suppressed)."""
+    from show_team_ratings_v3 import calculate_team_ratings
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ratings_lookup(calculate_team_ratings(_season_games[:n_games], min_games=5,
+                                                     use_sos_adjustment=True))
+
+
+def parallel_week_ratings(games: List[Dict], training_count: int, weeks: List[List[Dict]], workers: int):
+    """
+    Yield each week's ratings lookup (or exception), computed across a process pool.
+
+    Every week only needs the games before it, which is a prefix of the
+    date-sorted season, so workers rate weeks independently and only the
+    prefix length is sent per task.
+
+    Args:
+        games: The whole date-sorted season (training games first)
+        training_count: Number of games before the first week
+        weeks: Each week's games, in date order
+        workers: Pool size
+    """
+    prefix_ends = np.cumsum([training_count] + [len(w) for w in weeks[:-1]])
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(games,)) as pool:
+        futures = [pool.submit(_week_ratings, int(n)) for n in prefix_ends]
+        for future in futures:
+            try:
+                yield future.result()
+            except Exception as e:
+                yield e
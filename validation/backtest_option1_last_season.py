@@ -10,33 +10,44 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 os.environ.pop('DATABASE_URL', None)
 
-from src.espn_collector import get_espn_collector
-from datetime import datetime
-from collections import defaultdict
 import numpy as np
 
 # Add scripts directory to path
 scripts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
 sys.path.insert(0, scripts_dir)
-from show_team_ratings_v3 import calculate_team_ratings
+from show_team_ratings_v3 import _parse_game_date
+from _season_data import cached_season_games, parallel_week_ratings, sequential_week_ratings, week_slices
 
-def backtest_last_season():
+# One row per stored prediction (team names beyond 64 characters are truncated)
+PREDICTION_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('home_team', 'U64'),
+    ('away_team', 'U64'),
+    ('predicted_margin', 'f8'),
+    ('actual_margin', 'f8'),
+    ('correct', '?'),
+    ('home_rating', 'f8'),
+    ('away_rating', 'f8'),
+])
+
+def backtest_last_season(workers=1):
     """
     Backtest on 2024-25 season:
     1. Get all games from 2024-25 season
     2. For each week, calculate ratings using only prior games
     3. Predict outcomes for that week
     4. Compare to actual results
+    
+    With workers > 1 the weekly ratings are computed in parallel across that
+    many processes; otherwise they are updated incrementally in-process.
     """
     print("\n" + "="*100)
     print("OPTION 1: BACKTESTING ON 2024-25 SEASON")
     print("="*100 + "\n")
     
-    espn = get_espn_collector()
-    
     # Fetch 2024-25 season games
     print("Fetching 2024-25 season games from ESPN...")
-    all_games = espn.get_all_games_via_team_schedules(season=2025)
+    all_games = cached_season_games(2025)
     
     # Filter completed games with scores
     completed_games = [
@@ -44,12 +55,15 @@ def backtest_last_season():
         if g.get('HomeTeamScore') is not None and g.get('AwayTeamScore') is not None
     ]
     
-    # Sort by date
+    # Sort by date (parsed once per distinct timestamp; games without a
+    # parseable date are skipped rather than bucketed into the current week)
     for game in completed_games:
-        try:
-            game['date_obj'] = datetime.fromisoformat(game['DateTime'].replace('Z', '+00:00'))
-        except:
-            game['date_obj'] = datetime.now()
+        game['date_obj'] = _parse_game_date(game.get('DateTime') or '')
+    
+    undated = sum(1 for g in completed_games if g['date_obj'] is None)
+    if undated:
+        print(f"⚠️  Skipping {undated} games with missing or invalid DateTime")
+        completed_games = [g for g in completed_games if g['date_obj'] is not None]
     
     completed_games.sort(key=lambda x: x['date_obj'])
     
@@ -70,101 +84,75 @@ def backtest_last_season():
     print(f"✓ Testing period: {len(test_games)} games")
     print()
     
-    # Track predictions
-    predictions = []
-    correct_predictions = 0
-    total_predictions = 0
+    # Track predictions: one PREDICTION_DTYPE record array per week
+    weekly_records = []
     
     # Weekly backtesting
     print("Running weekly predictions...")
     print("-" * 100)
     
-    # Group test games by week
-    weeks = defaultdict(list)
-    for game in test_games:
-        week_key = game['date_obj'].strftime('%Y-W%U')  # Year-Week format
-        weeks[week_key].append(game)
-    
-    current_training_games = training_games.copy()
-    
-    for week_num, (week_key, week_games) in enumerate(sorted(weeks.items()), 1):
-        # Calculate ratings using all games up to this week
-        try:
-            ratings_result = calculate_team_ratings(current_training_games, min_games=5, use_sos_adjustment=True)
-            # Handle both old format (list) and new format (tuple)
-            if isinstance(ratings_result, tuple):
-                ratings, neutral_stats = ratings_result
-            else:
-                ratings = ratings_result
-            ratings_dict = {r['team_id']: r for r in ratings}
-        except Exception as e:
-            print(f"Error calculating ratings for week {week_key}: {e}")
+    # Group test games by week (Year-Week format); they are in date order
+    test_days = np.array([g['date_obj'].date() for g in test_games], dtype='datetime64[D]')
+    week_items = [(week_key, test_games[lo:hi]) for week_key, lo, hi in week_slices(test_days)]
+    week_games_list = [week_games for _, week_games in week_items]
+    if workers > 1:
+        week_ratings = parallel_week_ratings(completed_games, len(training_games), week_games_list, workers)
+    else:
+        week_ratings = sequential_week_ratings(training_games, week_games_list)
+    
+    for week_num, ((week_key, week_games), lookup) in enumerate(zip(week_items, week_ratings), 1):
+        # Ratings using all games up to this week
+        if isinstance(lookup, Exception):
+            print(f"Error calculating ratings for week {week_key}: {lookup}")
             continue
-        
-        # Predict each game in this week
-        week_correct = 0
-        week_total = 0
-        
-        for game in week_games:
-            home_id = game.get('HomeTeamID')
-            away_id = game.get('AwayTeamID')
-            home_score = game.get('HomeTeamScore')
-            away_score = game.get('AwayTeamScore')
-            
-            if not (home_id and away_id and home_score is not None and away_score is not None):
-                continue
-            
-            if home_id not in ratings_dict or away_id not in ratings_dict:
-                continue  # Skip if teams don't have enough games
-            
-            # Get ratings
-            home_rating = ratings_dict[home_id]['overall_rating']
-            away_rating = ratings_dict[away_id]['overall_rating']
-            
-            # Predict margin (home team perspective)
-            predicted_margin = home_rating - away_rating
-            
-            # Actual margin
-            actual_margin = home_score - away_score
-            
-            # Check if prediction was correct (same sign = correct direction)
-            predicted_winner = "HOME" if predicted_margin > 0 else "AWAY"
-            actual_winner = "HOME" if actual_margin > 0 else "AWAY"
-            
-            is_correct = predicted_winner == actual_winner
-            
-            if is_correct:
-                week_correct += 1
-                correct_predictions += 1
-            
-            week_total += 1
-            total_predictions += 1
-            
-            # Store prediction details
-            predictions.append({
-                'date': game['date_obj'],
-                'home_team': game.get('HomeTeamName', 'Unknown'),
-                'away_team': game.get('AwayTeamName', 'Unknown'),
-                'predicted_margin': predicted_margin,
-                'actual_margin': actual_margin,
-                'predicted_winner': predicted_winner,
-                'actual_winner': actual_winner,
-                'correct': is_correct,
-                'home_rating': home_rating,
-                'away_rating': away_rating
-            })
+        team_to_row, rating_by_row = lookup
+        
+        # Predict each game in this week: keep games whose teams both have ratings
+        home_rows = np.array([team_to_row.get(g.get('HomeTeamID'), -1) for g in week_games], dtype=np.intp)
+        away_rows = np.array([team_to_row.get(g.get('AwayTeamID'), -1) for g in week_games], dtype=np.intp)
+        rated = (home_rows >= 0) & (away_rows >= 0)
+        week_games = [g for g, is_rated in zip(week_games, rated.tolist()) if is_rated]
+        
+        # Stack the week into arrays so margins and correctness are vector ops
+        home_ratings = rating_by_row[home_rows[rated]]
+        away_ratings = rating_by_row[away_rows[rated]]
+        home_scores = np.array([g['HomeTeamScore'] for g in week_games], dtype=float)
+        away_scores = np.array([g['AwayTeamScore'] for g in week_games], dtype=float)
+        
+        # Predict margin (home team perspective) and compare winners
+        predicted_margins = home_ratings - away_ratings
+        actual_margins = home_scores - away_scores
+        predicted_home = predicted_margins > 0
+        actual_home = actual_margins > 0
+        correct = predicted_home == actual_home
+        
+        week_correct = int(correct.sum())
+        week_total = len(week_games)
+        
+        # Store prediction details column by column
+        records = np.empty(week_total, dtype=PREDICTION_DTYPE)
+        records['date'] = [g['date_obj'].date() for g in week_games]
+        records['home_team'] = [g.get('HomeTeamName', 'Unknown') for g in week_games]
+        records['away_team'] = [g.get('AwayTeamName', 'Unknown') for g in week_games]
+        records['predicted_margin'] = predicted_margins
+        records['actual_margin'] = actual_margins
+        records['correct'] = correct
+        records['home_rating'] = home_ratings
+        records['away_rating'] = away_ratings
+        weekly_records.append(records)
         
         # Print weekly results
         if week_total > 0:
             week_accuracy = (week_correct / week_total) * 100
             print(f"Week {week_num} ({week_key}): {week_correct}/{week_total} correct ({week_accuracy:.1f}%)")
-        
-        # Add this week's games to training set for next week
-        current_training_games.extend(week_games)
     
     print("-" * 100)
     print()
     
+    predictions = np.concatenate(weekly_records) if weekly_records else np.empty(0, dtype=PREDICTION_DTYPE)
+    correct_predictions = int(predictions['correct'].sum())
+    total_predictions = len(predictions)
+    
     # Calculate overall statistics
     if total_predictions > 0:
         overall_accuracy = (correct_predictions / total_predictions) * 100
@@ -179,7 +167,7 @@ def backtest_last_season():
         print()
         
         # Calculate additional statistics
-        margins = [abs(p['predicted_margin'] - p['actual_margin']) for p in predictions]
+        margins = np.abs(predictions['predicted_margin'] - predictions['actual_margin'])
         avg_margin_error = np.mean(margins)
         median_margin_error = np.median(margins)
         
@@ -187,22 +175,20 @@ def backtest_last_season():
         print(f"Median Margin Error: {median_margin_error:.2f} points")
         print()
         
-        # Breakdown by confidence
-        high_conf = [p for p in predictions if abs(p['predicted_margin']) > 10]
-        med_conf = [p for p in predictions if 5 < abs(p['predicted_margin']) <= 10]
-        low_conf = [p for p in predictions if abs(p['predicted_margin']) <= 5]
-        
-        if high_conf:
-            high_acc = sum(1 for p in high_conf if p['correct']) / len(high_conf) * 100
-            print(f"High Confidence (>10 pt margin): {len(high_conf)} games, {high_acc:.1f}% accuracy")
-        
-        if med_conf:
-            med_acc = sum(1 for p in med_conf if p['correct']) / len(med_conf) * 100
-            print(f"Medium Confidence (5-10 pt margin): {len(med_conf)} games, {med_acc:.1f}% accuracy")
-        
-        if low_conf:
-            low_acc = sum(1 for p in low_conf if p['correct']) / len(low_conf) * 100
-            print(f"Low Confidence (<5 pt margin): {len(low_conf)} games, {low_acc:.1f}% accuracy")
+        # Breakdown by confidence: bucket 0 = <=5, 1 = (5, 10], 2 = >10 pt margin
+        buckets = np.digitize(np.abs(predictions['predicted_margin']), [5.0, 10.0], right=True)
+        bucket_games = np.bincount(buckets, minlength=3)
+        bucket_correct = np.bincount(buckets, weights=predictions['correct'], minlength=3)
+        bucket_labels = [
+            (2, "High Confidence (>10 pt margin)"),
+            (1, "Medium Confidence (5-10 pt margin)"),
+            (0, "Low Confidence (<5 pt margin)"),
+        ]
+        
+        for bucket, label in bucket_labels:
+            if bucket_games[bucket]:
+                accuracy = bucket_correct[bucket] / bucket_games[bucket] * 100
+                print(f"{label}: {bucket_games[bucket]} games, {accuracy:.1f}% accuracy")
         
         print()
         print("="*100)
@@ -214,28 +200,44 @@ def backtest_last_season():
         print("⚠️  No predictions made - insufficient data")
 
 def save_results(predictions, accuracy, filename):
-    """Save detailed results to file."""
+    """Save detailed results (a PREDICTION_DTYPE record array) to file."""
     output_file = f"backtest_results_{filename}.txt"
     
-    with open(output_file, 'w') as f:
-        f.write("="*100 + "\n")
-        f.write(f"BACKTESTING RESULTS - {filename.upper()}\n")
-        f.write("="*100 + "\n\n")
-        f.write(f"Overall Accuracy: {accuracy:.2f}%\n")
-        f.write(f"Total Predictions: {len(predictions)}\n\n")
-        
-        f.write("DETAILED PREDICTIONS:\n")
-        f.write("-"*100 + "\n")
-        
-        for i, p in enumerate(predictions, 1):
-            status = "✓" if p['correct'] else "✗"
-            f.write(f"{i}. {p['date'].strftime('%Y-%m-%d')} - {p['away_team']} @ {p['home_team']}\n")
-            f.write(f"   Predicted: {p['predicted_winner']} by {abs(p['predicted_margin']):.1f}\n")
-            f.write(f"   Actual: {p['actual_winner']} by {abs(p['actual_margin']):.1f}\n")
-            f.write(f"   Result: {status} {'CORRECT' if p['correct'] else 'INCORRECT'}\n\n")
+    lines = [
+        "="*100 + "\n",
+        f"BACKTESTING RESULTS - {filename.upper()}\n",
+        "="*100 + "\n\n",
+        f"Overall Accuracy: {accuracy:.2f}%\n",
+        f"Total Predictions: {len(predictions)}\n\n",
+        "DETAILED PREDICTIONS:\n",
+        "-"*100 + "\n",
+    ]
+    
+    # One formatted block per prediction, written to disk in a single call;
+    # winners are labelled from the margin signs only here, at report time
+    columns = ('date', 'home_team', 'away_team', 'predicted_margin', 'actual_margin', 'correct')
+    lines.extend(
+        f"{i}. {date:%Y-%m-%d} - {away_team} @ {home_team}\n"
+        f"   Predicted: {'HOME' if predicted_margin > 0 else 'AWAY'} by {abs(predicted_margin):.1f}\n"
+        f"   Actual: {'HOME' if actual_margin > 0 else 'AWAY'} by {abs(actual_margin):.1f}\n"
+        f"   Result: {'✓ CORRECT' if is_correct else '✗ INCORRECT'}\n\n"
+        for i, (date, home_team, away_team, predicted_margin, actual_margin, is_correct)
+        in enumerate(zip(*(predictions[c].tolist() for c in columns)), 1)
+    )
+    
+    with open(output_file, 'w', buffering=1 << 20) as f:
+        f.write(''.join(lines))
     
     print(f"✓ Detailed results saved to {output_file}")
 
 if __name__ == "__main__":
-    backtest_last_season()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Backtest ratings on the 2024-25 season")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes for the weekly ratings (default: 1, updated incrementally in-process)")
+    
+    args = parser.parse_args()
+    
+    backtest_last_season(workers=args.workers)
 
@@ -4,21 +4,32 @@ Uses time-based train/test split - more realistic for real-world usage.
 """
 import os
 import sys
+from operator import itemgetter
 
 # Add parent directory to path so we can import from src and scripts
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 os.environ.pop('DATABASE_URL', None)
 
-from src.espn_collector import get_espn_collector
-from datetime import datetime, timedelta
-from collections import defaultdict
 import numpy as np
 
 # Add scripts directory to path
 scripts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
 sys.path.insert(0, scripts_dir)
 from show_team_ratings_v3 import calculate_team_ratings
+from _season_data import cached_season_games, game_datetimes
+from _scoring import score_games
+
+def _k_smallest(values, k):
+    """
+    Indices of the k smallest values, in the order a stable ascending sort
+    would list them, found by partitioning rather than a full sort.
+    """
+    if len(values) <= k:
+        return np.argsort(values, kind='stable')
+    kth = np.partition(values, k - 1)[k - 1]
+    candidates = np.flatnonzero(values <= kth)
+    return candidates[np.argsort(values[candidates], kind='stable')][:k]
 
 def backtest_rolling_current_season():
     """
@@ -30,11 +41,9 @@ def backtest_rolling_current_season():
     print("OPTION 2: ROLLING VALIDATION ON CURRENT SEASON (2025-26)")
     print("="*100 + "\n")
     
-    espn = get_espn_collector()
-    
     # Fetch current season games
     print("Fetching 2025-26 season games from ESPN...")
-    all_games = espn.get_all_games_via_team_schedules(season=2026)
+    all_games = cached_season_games(2026)
     
     # Filter completed games with scores
     completed_games = [
@@ -42,14 +51,19 @@ def backtest_rolling_current_season():
         if g.get('HomeTeamScore') is not None and g.get('AwayTeamScore') is not None
     ]
     
-    # Sort by date
-    for game in completed_games:
-        try:
-            game['date_obj'] = datetime.fromisoformat(game['DateTime'].replace('Z', '+00:00'))
-        except:
-            game['date_obj'] = datetime.now()
+    # Sort by date (parsed as one datetime64 column; games without a
+    # parseable date are skipped rather than stamped with the current time)
+    game_dates = game_datetimes(completed_games)
     
-    completed_games.sort(key=lambda x: x['date_obj'])
+    dated = ~np.isnat(game_dates)
+    if not dated.all():
+        print(f"⚠️  Skipping {int((~dated).sum())} games with missing or invalid DateTime")
+        completed_games = [g for g, has_date in zip(completed_games, dated.tolist()) if has_date]
+        game_dates = game_dates[dated]
+    
+    order = np.argsort(game_dates, kind='stable')
+    completed_games = [completed_games[i] for i in order.tolist()]
+    game_dates = game_dates[order]
     
     print(f"✓ Found {len(completed_games)} completed games from 2025-26 season")
     
@@ -62,7 +76,8 @@ def backtest_rolling_current_season():
     training_games = completed_games[:split_point]
     test_games = completed_games[split_point:]
     
-    split_date = training_games[-1]['date_obj'] if training_games else datetime.now()
+    test_dates = game_dates[split_point:]
+    split_date = game_dates[split_point - 1].item()
     
     print(f"✓ Training period: {len(training_games)} games (up to {split_date.strftime('%Y-%m-%d')})")
     print(f"✓ Testing period: {len(test_games)} games (from {split_date.strftime('%Y-%m-%d')} onwards)")
@@ -77,7 +92,11 @@ def backtest_rolling_current_season():
             ratings, neutral_stats = ratings_result
         else:
             ratings = ratings_result
-        ratings_dict = {r['team_id']: r for r in ratings}
+        # team_id -> row, with ratings (and SOS) as flat arrays indexed by row;
+        # a falsy team_id never counts as rated
+        id_to_idx = {r['team_id']: i for i, r in enumerate(ratings) if r['team_id']}
+        ratings_arr = np.array([r['overall_rating'] for r in ratings], dtype=float)
+        sos_arr = np.array([r.get('sos', 0.5) for r in ratings], dtype=float)
         print(f"✓ Built ratings for {len(ratings)} teams")
     except Exception as e:
         print(f"Error calculating ratings: {e}")
@@ -89,64 +108,45 @@ def backtest_rolling_current_season():
     print("Testing on hold-out data...")
     print("-" * 100)
     
-    predictions = []
-    correct_predictions = 0
-    total_predictions = 0
+    # Predict every test game at once (home team perspective)
+    scores = score_games(test_games, ratings_arr, id_to_idx)
+    correct = scores['correct']
+    margin_errors = scores['margin_error']
     
-    # Predict each test game
-    for game in test_games:
-        home_id = game.get('HomeTeamID')
-        away_id = game.get('AwayTeamID')
-        home_score = game.get('HomeTeamScore')
-        away_score = game.get('AwayTeamScore')
-        
-        if not (home_id and away_id and home_score is not None and away_score is not None):
-            continue
-        
-        if home_id not in ratings_dict or away_id not in ratings_dict:
-            continue  # Skip if teams don't have ratings
-        
-        # Get ratings
-        home_rating = ratings_dict[home_id]['overall_rating']
-        away_rating = ratings_dict[away_id]['overall_rating']
-        
-        # Predict margin
-        predicted_margin = home_rating - away_rating
-        
-        # Actual margin
-        actual_margin = home_score - away_score
-        
-        # Check if prediction was correct
-        predicted_winner = "HOME" if predicted_margin > 0 else "AWAY"
-        actual_winner = "HOME" if actual_margin > 0 else "AWAY"
-        
-        is_correct = predicted_winner == actual_winner
-        
-        if is_correct:
-            correct_predictions += 1
-        
-        total_predictions += 1
-        
-        # Store prediction
-        predictions.append({
-            'date': game['date_obj'],
-            'home_team': game.get('HomeTeamName', 'Unknown'),
-            'away_team': game.get('AwayTeamName', 'Unknown'),
+    correct_predictions = int(correct.sum())
+    total_predictions = len(scores)
+    
+    # Store predictions
+    predictions = [
+        {
+            'date': date,
+            'home_team': test_games[i].get('HomeTeamName', 'Unknown'),
+            'away_team': test_games[i].get('AwayTeamName', 'Unknown'),
             'predicted_margin': predicted_margin,
             'actual_margin': actual_margin,
-            'predicted_winner': predicted_winner,
-            'actual_winner': actual_winner,
+            'predicted_winner': "HOME" if predicted_margin > 0 else "AWAY",
+            'actual_winner': "HOME" if actual_margin > 0 else "AWAY",
             'correct': is_correct,
+            'margin_error': margin_error,
             'home_rating': home_rating,
             'away_rating': away_rating,
-            'home_sos': ratings_dict[home_id].get('sos', 0.5),
-            'away_sos': ratings_dict[away_id].get('sos', 0.5)
-        })
-        
-        # Print every 20th prediction
-        if total_predictions % 20 == 0:
-            running_acc = (correct_predictions / total_predictions) * 100
-            print(f"Predictions: {total_predictions}, Running accuracy: {running_acc:.1f}%")
+            'home_sos': home_sos,
+            'away_sos': away_sos
+        }
+        for i, date, predicted_margin, actual_margin, is_correct, margin_error,
+            home_rating, away_rating, home_sos, away_sos
+        in zip(scores['game'].tolist(), test_dates[scores['game']].tolist(),
+               scores['predicted_margin'].tolist(), scores['actual_margin'].tolist(),
+               correct.tolist(), margin_errors.tolist(),
+               ratings_arr[scores['home']].tolist(), ratings_arr[scores['away']].tolist(),
+               sos_arr[scores['home']].tolist(), sos_arr[scores['away']].tolist())
+    ]
+    
+    # Running accuracy at every 20th prediction
+    running_correct = np.cumsum(correct)
+    for n in range(20, total_predictions + 1, 20):
+        running_acc = (running_correct[n - 1] / n) * 100
+        print(f"Predictions: {n}, Running accuracy: {running_acc:.1f}%")
     
     print("-" * 100)
     print()
@@ -166,10 +166,9 @@ def backtest_rolling_current_season():
         print()
         
         # Margin analysis
-        margins = [abs(p['predicted_margin'] - p['actual_margin']) for p in predictions]
-        avg_margin_error = np.mean(margins)
-        median_margin_error = np.median(margins)
-        std_margin_error = np.std(margins)
+        avg_margin_error = margin_errors.mean()
+        median_margin_error = np.median(margin_errors)
+        std_margin_error = margin_errors.std()
         
         print(f"Average Margin Error: {avg_margin_error:.2f} points")
         print(f"Median Margin Error: {median_margin_error:.2f} points")
@@ -193,20 +192,22 @@ def backtest_rolling_current_season():
         
         print()
         
-        # Best and worst predictions
-        predictions.sort(key=lambda p: abs(p['predicted_margin'] - p['actual_margin']))
+        # Best and worst predictions: partial selection instead of sorting every prediction
+        # (worst = smallest negated error, scanning from the end so later games win ties)
+        best = _k_smallest(margin_errors, 5)
+        worst = len(margin_errors) - 1 - _k_smallest(-margin_errors[::-1], 5)
         
         print("BEST PREDICTIONS (smallest margin error):")
-        for i, p in enumerate(predictions[:5], 1):
-            error = abs(p['predicted_margin'] - p['actual_margin'])
+        for i, p in enumerate((predictions[j] for j in best.tolist()), 1):
+            error = p['margin_error']
             status = "✓" if p['correct'] else "✗"
             print(f"  {i}. {p['home_team']} vs {p['away_team']}")
             print(f"     Predicted: {p['predicted_margin']:+.1f}, Actual: {p['actual_margin']:+.1f}, Error: {error:.1f} {status}")
         
         print()
         print("WORST PREDICTIONS (largest margin error):")
-        for i, p in enumerate(predictions[-5:][::-1], 1):
-            error = abs(p['predicted_margin'] - p['actual_margin'])
+        for i, p in enumerate((predictions[j] for j in worst.tolist()), 1):
+            error = p['margin_error']
             status = "✓" if p['correct'] else "✗"
             print(f"  {i}. {p['home_team']} vs {p['away_team']}")
             print(f"     Predicted: {p['predicted_margin']:+.1f}, Actual: {p['actual_margin']:+.1f}, Error: {error:.1f} {status}")
@@ -224,29 +225,34 @@ def save_results(predictions, accuracy, split_date, filename):
     """Save detailed results to file."""
     output_file = f"backtest_results_{filename}.txt"
     
-    with open(output_file, 'w') as f:
-        f.write("="*100 + "\n")
-        f.write(f"ROLLING VALIDATION RESULTS\n")
-        f.write("="*100 + "\n\n")
-        f.write(f"Split Date: {split_date.strftime('%Y-%m-%d')}\n")
-        f.write(f"Overall Accuracy: {accuracy:.2f}%\n")
-        f.write(f"Total Predictions: {len(predictions)}\n\n")
-        
-        f.write("DETAILED PREDICTIONS:\n")
-        f.write("-"*100 + "\n")
-        
-        # Sort by date
-        predictions.sort(key=lambda p: p['date'])
-        
-        for i, p in enumerate(predictions, 1):
-            status = "✓" if p['correct'] else "✗"
-            f.write(f"{i}. {p['date'].strftime('%Y-%m-%d')} - {p['away_team']} @ {p['home_team']}\n")
-            f.write(f"   Ratings: Home {p['home_rating']:+.1f} (SOS: {p['home_sos']:.3f}) vs ")
-            f.write(f"Away {p['away_rating']:+.1f} (SOS: {p['away_sos']:.3f})\n")
-            f.write(f"   Predicted: {p['predicted_winner']} by {abs(p['predicted_margin']):.1f}\n")
-            f.write(f"   Actual: {p['actual_winner']} by {abs(p['actual_margin']):.1f}\n")
-            f.write(f"   Error: {abs(p['predicted_margin'] - p['actual_margin']):.1f} pts\n")
-            f.write(f"   Result: {status} {'CORRECT' if p['correct'] else 'INCORRECT'}\n\n")
+    # Sort by date (equal dates by margin error)
+    predictions.sort(key=itemgetter('date', 'margin_error'))
+    
+    lines = [
+        "="*100 + "\n",
+        "ROLLING VALIDATION RESULTS\n",
+        "="*100 + "\n\n",
+        f"Split Date: {split_date.strftime('%Y-%m-%d')}\n",
+        f"Overall Accuracy: {accuracy:.2f}%\n",
+        f"Total Predictions: {len(predictions)}\n\n",
+        "DETAILED PREDICTIONS:\n",
+        "-"*100 + "\n",
+    ]
+    
+    # One formatted block per prediction, written to disk in a single call
+    lines.extend(
+        f"{i}. {p['date']:%Y-%m-%d} - {p['away_team']} @ {p['home_team']}\n"
+        f"   Ratings: Home {p['home_rating']:+.1f} (SOS: {p['home_sos']:.3f}) vs "
+        f"Away {p['away_rating']:+.1f} (SOS: {p['away_sos']:.3f})\n"
+        f"   Predicted: {p['predicted_winner']} by {abs(p['predicted_margin']):.1f}\n"
+        f"   Actual: {p['actual_winner']} by {abs(p['actual_margin']):.1f}\n"
+        f"   Error: {p['margin_error']:.1f} pts\n"
+        f"   Result: {'✓' if p['correct'] else '✗'} {'CORRECT' if p['correct'] else 'INCORRECT'}\n\n"
+        for i, p in enumerate(predictions, 1)
+    )
+    
+    with open(output_file, 'w', buffering=1 << 20) as f:
+        f.write(''.join(lines))
     
     print(f"✓ Detailed results saved to {output_file}")
 
@@ -2,41 +2,102 @@
 OPTION 3: K-Fold Cross-Validation (Most Rigorous)
 Multiple train/test splits with confidence intervals.
 """
+import contextlib
+import io
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 
 # Add parent directory to path so we can import from src and scripts
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 os.environ.pop('DATABASE_URL', None)
 
-from src.espn_collector import get_espn_collector
-from datetime import datetime
-from collections import defaultdict
 import numpy as np
+from sklearn.model_selection import TimeSeriesSplit
 
 # Add scripts directory to path
 scripts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
 sys.path.insert(0, scripts_dir)
 from show_team_ratings_v3 import calculate_team_ratings
+from _season_data import cached_season_games, game_datetimes
+from _scoring import score_games
 
-def backtest_cross_validation(k_folds=5):
+# Season games and their datetime64 dates shared with pool workers (set once
+# per worker by the initializer)
+_season_games = []
+_season_dates = None
+
+def _run_fold(fold_num, train_games, test_games, test_dates):
+    """
+    Rate train_games and predict test_games (dated by the test_dates array) for one fold.
+    
+    Returns:
+        (number of rated teams, correct predictions, total predictions, prediction dicts,
+         absolute margin errors array)
+    """
+    ratings_result = calculate_team_ratings(train_games, min_games=5, use_sos_adjustment=True)
+    # Handle both old format (list) and new format (tuple)
+    if isinstance(ratings_result, tuple):
+        ratings, neutral_stats = ratings_result
+    else:
+        ratings = ratings_result
+    # team_id -> row, with ratings as a flat array indexed by row;
+    # a falsy team_id never counts as rated
+    id_to_idx = {r['team_id']: i for i, r in enumerate(ratings) if r['team_id']}
+    ratings_arr = np.array([r['overall_rating'] for r in ratings], dtype=float)
+    
+    # Predict the whole fold at once
+    scores = score_games(test_games, ratings_arr, id_to_idx)
+    
+    predictions = [
+        {
+            'fold': fold_num + 1,
+            'date': date,
+            'home_team': test_games[i].get('HomeTeamName', 'Unknown'),
+            'away_team': test_games[i].get('AwayTeamName', 'Unknown'),
+            'predicted_margin': predicted_margin,
+            'actual_margin': actual_margin,
+            'correct': game_correct
+        }
+        for i, date, predicted_margin, actual_margin, game_correct
+        in zip(scores['game'].tolist(), test_dates[scores['game']].tolist(),
+               scores['predicted_margin'].tolist(), scores['actual_margin'].tolist(),
+               scores['correct'].tolist())
+    ]
+    return len(ratings), int(scores['correct'].sum()), len(scores), predictions, scores['margin_error']
+
+def _init_worker(games, dates):
+    """Pool initializer: ship the season's games and dates to each worker once."""
+    global _season_games, _season_dates
+    _season_games = games
+    _season_dates = dates
+
+def _run_fold_in_worker(fold_num, start_idx, end_idx):
+    """Pool task: train on _season_games[:start_idx], test on [start_idx:end_idx] (progress output suppressed)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _run_fold(fold_num, _season_games[:start_idx], _season_games[start_idx:end_idx],
+                         _season_dates[start_idx:end_idx])
+
+def backtest_cross_validation(k_folds=5, workers=1):
     """
-    K-fold cross-validation:
-    - Split games into K folds chronologically
-    - For each fold: train on other K-1 folds, test on that fold
+    K-fold time-series cross-validation:
+    - Split games into K chronological test folds (scikit-learn TimeSeriesSplit)
+    - For each fold: train on every game before it, test on that fold, so
+      no future games leak into the ratings used to predict the past
     - Average accuracy across all folds
     - Provides confidence intervals
+    
+    With workers > 1 the folds run in parallel across up to that many processes.
     """
     print("\n" + "="*100)
     print(f"OPTION 3: {k_folds}-FOLD CROSS-VALIDATION (MOST RIGOROUS)")
     print("="*100 + "\n")
     
-    espn = get_espn_collector()
-    
     # Fetch current season games (can also use last season)
     print("Fetching 2025-26 season games from ESPN...")
-    all_games = espn.get_all_games_via_team_schedules(season=2026)
+    all_games = cached_season_games(2026)
     
     # Filter completed games with scores
     completed_games = [
@@ -44,14 +105,19 @@ def backtest_cross_validation(k_folds=5):
         if g.get('HomeTeamScore') is not None and g.get('AwayTeamScore') is not None
     ]
     
-    # Sort by date
-    for game in completed_games:
-        try:
-            game['date_obj'] = datetime.fromisoformat(game['DateTime'].replace('Z', '+00:00'))
-        except:
-            game['date_obj'] = datetime.now()
+    # Sort by date (parsed as one datetime64 column; games without a
+    # parseable date are skipped rather than stamped with the current time)
+    game_dates = game_datetimes(completed_games)
+    
+    dated = ~np.isnat(game_dates)
+    if not dated.all():
+        print(f"⚠️  Skipping {int((~dated).sum())} games with missing or invalid DateTime")
+        completed_games = [g for g, has_date in zip(completed_games, dated.tolist()) if has_date]
+        game_dates = game_dates[dated]
     
-    completed_games.sort(key=lambda x: x['date_obj'])
+    order = np.argsort(game_dates, kind='stable')
+    completed_games = [completed_games[i] for i in order.tolist()]
+    game_dates = game_dates[order]
     
     print(f"✓ Found {len(completed_games)} completed games from 2025-26 season")
     
@@ -62,102 +128,72 @@ def backtest_cross_validation(k_folds=5):
     
     print()
     
-    # Split into K folds (chronologically)
-    fold_size = len(completed_games) // k_folds
-    folds = []
+    # Split into K forward-chaining folds: (start, end) slice bounds of each test
+    # fold in completed_games; its training set is everything before start
+    fold_bounds = [
+        (int(test_idx[0]), int(test_idx[-1]) + 1)
+        for _, test_idx in TimeSeriesSplit(n_splits=k_folds).split(game_dates)
+    ]
+    fold_days = game_dates.astype('datetime64[D]')
     
-    for i in range(k_folds):
-        start_idx = i * fold_size
-        end_idx = start_idx + fold_size if i < k_folds - 1 else len(completed_games)
-        folds.append(completed_games[start_idx:end_idx])
-        
-        fold_start = completed_games[start_idx]['date_obj'].strftime('%Y-%m-%d')
-        fold_end = completed_games[end_idx-1]['date_obj'].strftime('%Y-%m-%d')
-        print(f"Fold {i+1}: {len(folds[i])} games ({fold_start} to {fold_end})")
+    for i, (start_idx, end_idx) in enumerate(fold_bounds):
+        print(f"Fold {i+1}: {end_idx - start_idx} games ({fold_days[start_idx]} to {fold_days[end_idx-1]})")
     
     print()
     
-    # Run cross-validation
+    # Run cross-validation (folds are independent: with workers > 1 they are
+    # all submitted to a process pool up front and collected in fold order)
     fold_accuracies = []
     fold_predictions = []
+    fold_margin_errors = []
+    all_correct = 0
     
-    for fold_num in range(k_folds):
-        print(f"\n{'='*100}")
-        print(f"FOLD {fold_num + 1}/{k_folds}")
-        print('='*100)
-        
-        # Create train/test split
-        test_fold = folds[fold_num]
-        train_folds = [game for i, fold in enumerate(folds) if i != fold_num for game in fold]
-        
-        print(f"Training games: {len(train_folds)}")
-        print(f"Test games: {len(test_fold)}")
-        
-        # Build ratings on training data
-        try:
-            ratings_result = calculate_team_ratings(train_folds, min_games=5, use_sos_adjustment=True)
-            # Handle both old format (list) and new format (tuple)
-            if isinstance(ratings_result, tuple):
-                ratings, neutral_stats = ratings_result
-            else:
-                ratings = ratings_result
-            ratings_dict = {r['team_id']: r for r in ratings}
-            print(f"✓ Built ratings for {len(ratings)} teams")
-        except Exception as e:
-            print(f"✗ Error calculating ratings: {e}")
-            continue
-        
-        # Test on this fold
-        correct = 0
-        total = 0
-        predictions = []
-        
-        for game in test_fold:
-            home_id = game.get('HomeTeamID')
-            away_id = game.get('AwayTeamID')
-            home_score = game.get('HomeTeamScore')
-            away_score = game.get('AwayTeamScore')
+    pool = futures = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=min(workers, k_folds), initializer=_init_worker,
+                                   initargs=(completed_games, game_dates))
+        futures = [pool.submit(_run_fold_in_worker, fold_num, start_idx, end_idx)
+                   for fold_num, (start_idx, end_idx) in enumerate(fold_bounds)]
+    
+    try:
+        for fold_num in range(k_folds):
+            print(f"\n{'='*100}")
+            print(f"FOLD {fold_num + 1}/{k_folds}")
+            print('='*100)
             
-            if not (home_id and away_id and home_score is not None and away_score is not None):
-                continue
+            # Train/test split: the held-out slice and every game before it
+            start_idx, end_idx = fold_bounds[fold_num]
+            print(f"Training games: {start_idx}")
+            print(f"Test games: {end_idx - start_idx}")
             
-            if home_id not in ratings_dict or away_id not in ratings_dict:
+            # Build ratings on training data and predict the held-out fold
+            try:
+                if futures is not None:
+                    n_rated, correct, total, predictions, margin_errors = futures[fold_num].result()
+                else:
+                    n_rated, correct, total, predictions, margin_errors = _run_fold(
+                        fold_num, completed_games[:start_idx], completed_games[start_idx:end_idx],
+                        game_dates[start_idx:end_idx])
+                print(f"✓ Built ratings for {n_rated} teams")
+            except Exception as e:
+                print(f"✗ Error calculating ratings: {e}")
                 continue
             
-            # Predict
-            home_rating = ratings_dict[home_id]['overall_rating']
-            away_rating = ratings_dict[away_id]['overall_rating']
-            predicted_margin = home_rating - away_rating
-            actual_margin = home_score - away_score
-            
-            predicted_winner = "HOME" if predicted_margin > 0 else "AWAY"
-            actual_winner = "HOME" if actual_margin > 0 else "AWAY"
-            is_correct = predicted_winner == actual_winner
-            
-            if is_correct:
-                correct += 1
-            total += 1
-            
-            predictions.append({
-                'fold': fold_num + 1,
-                'date': game['date_obj'],
-                'home_team': game.get('HomeTeamName', 'Unknown'),
-                'away_team': game.get('AwayTeamName', 'Unknown'),
-                'predicted_margin': predicted_margin,
-                'actual_margin': actual_margin,
-                'correct': is_correct
-            })
-        
-        if total > 0:
-            fold_accuracy = (correct / total) * 100
-            fold_accuracies.append(fold_accuracy)
-            fold_predictions.extend(predictions)
-            
-            print(f"\nFold {fold_num + 1} Results:")
-            print(f"  Correct: {correct}/{total}")
-            print(f"  Accuracy: {fold_accuracy:.2f}%")
-        else:
-            print(f"\nFold {fold_num + 1}: No valid predictions")
+            if total > 0:
+                fold_accuracy = (correct / total) * 100
+                fold_accuracies.append(fold_accuracy)
+                fold_predictions.extend(predictions)
+                fold_margin_errors.append(margin_errors)
+                all_correct += correct
+                
+                print(f"\nFold {fold_num + 1} Results:")
+                print(f"  Correct: {correct}/{total}")
+                print(f"  Accuracy: {fold_accuracy:.2f}%")
+            else:
+                print(f"\nFold {fold_num + 1}: No valid predictions")
+    finally:
+        if pool is not None:
+            pool.shutdown()
     
     # Calculate overall statistics
     print("\n" + "="*100)
@@ -186,7 +222,6 @@ def backtest_cross_validation(k_folds=5):
         print()
         
         # Overall statistics across all folds
-        all_correct = sum(1 for p in fold_predictions if p['correct'])
         all_total = len(fold_predictions)
         overall_accuracy = (all_correct / all_total) * 100 if all_total > 0 else 0
         
@@ -197,11 +232,11 @@ def backtest_cross_validation(k_folds=5):
         print()
         
         # Margin analysis
-        margins = [abs(p['predicted_margin'] - p['actual_margin']) for p in fold_predictions]
+        margins = np.concatenate(fold_margin_errors)
         print(f"Margin Error Statistics:")
-        print(f"  Mean Absolute Error: {np.mean(margins):.2f} points")
+        print(f"  Mean Absolute Error: {margins.mean():.2f} points")
         print(f"  Median Absolute Error: {np.median(margins):.2f} points")
-        print(f"  Std Dev: {np.std(margins):.2f} points")
+        print(f"  Std Dev: {margins.std():.2f} points")
         print()
         
         # Statistical significance test
@@ -235,38 +270,50 @@ def save_results(predictions, fold_accuracies, mean_acc, std_acc, ci):
     """Save detailed cross-validation results."""
     output_file = "backtest_results_option3_cross_validation.txt"
     
-    with open(output_file, 'w') as f:
-        f.write("="*100 + "\n")
-        f.write("CROSS-VALIDATION RESULTS\n")
-        f.write("="*100 + "\n\n")
-        
-        f.write(f"Number of Folds: {len(fold_accuracies)}\n")
-        f.write(f"Mean Accuracy: {mean_acc:.2f}%\n")
-        f.write(f"Standard Deviation: {std_acc:.2f}%\n")
-        f.write(f"95% Confidence Interval: [{mean_acc - ci:.2f}%, {mean_acc + ci:.2f}%]\n\n")
-        
-        f.write("FOLD ACCURACIES:\n")
-        for i, acc in enumerate(fold_accuracies, 1):
-            f.write(f"  Fold {i}: {acc:.2f}%\n")
-        
-        f.write("\n" + "="*100 + "\n")
-        f.write("DETAILED PREDICTIONS (all folds):\n")
-        f.write("-"*100 + "\n\n")
-        
-        # Sort by date
-        predictions.sort(key=lambda p: p['date'])
-        
-        for i, p in enumerate(predictions, 1):
-            status = "✓" if p['correct'] else "✗"
-            f.write(f"{i}. [Fold {p['fold']}] {p['date'].strftime('%Y-%m-%d')} - ")
-            f.write(f"{p['away_team']} @ {p['home_team']}\n")
-            f.write(f"   Predicted margin: {p['predicted_margin']:+.1f}\n")
-            f.write(f"   Actual margin: {p['actual_margin']:+.1f}\n")
-            f.write(f"   Error: {abs(p['predicted_margin'] - p['actual_margin']):.1f} pts\n")
-            f.write(f"   {status} {'CORRECT' if p['correct'] else 'INCORRECT'}\n\n")
+    # Sort by date
+    predictions.sort(key=itemgetter('date'))
+    
+    lines = [
+        "="*100 + "\n",
+        "CROSS-VALIDATION RESULTS\n",
+        "="*100 + "\n\n",
+        f"Number of Folds: {len(fold_accuracies)}\n",
+        f"Mean Accuracy: {mean_acc:.2f}%\n",
+        f"Standard Deviation: {std_acc:.2f}%\n",
+        f"95% Confidence Interval: [{mean_acc - ci:.2f}%, {mean_acc + ci:.2f}%]\n\n",
+        "FOLD ACCURACIES:\n",
+    ]
+    lines.extend(f"  Fold {i}: {acc:.2f}%\n" for i, acc in enumerate(fold_accuracies, 1))
+    lines += [
+        "\n" + "="*100 + "\n",
+        "DETAILED PREDICTIONS (all folds):\n",
+        "-"*100 + "\n\n",
+    ]
+    
+    # One formatted block per prediction, written to disk in a single call
+    lines.extend(
+        f"{i}. [Fold {p['fold']}] {p['date']:%Y-%m-%d} - "
+        f"{p['away_team']} @ {p['home_team']}\n"
+        f"   Predicted margin: {p['predicted_margin']:+.1f}\n"
+        f"   Actual margin: {p['actual_margin']:+.1f}\n"
+        f"   Error: {abs(p['predicted_margin'] - p['actual_margin']):.1f} pts\n"
+        f"   {'✓' if p['correct'] else '✗'} {'CORRECT' if p['correct'] else 'INCORRECT'}\n\n"
+        for i, p in enumerate(predictions, 1)
+    )
+    
+    with open(output_file, 'w', buffering=1 << 20) as f:
+        f.write(''.join(lines))
     
     print(f"✓ Detailed results saved to {output_file}")
 
 if __name__ == "__main__":
-    backtest_cross_validation(k_folds=5)
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="K-fold time-series cross-validation of the ratings")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes to run the folds in (default: 1, one fold after another)")
+    
+    args = parser.parse_args()
+    
+    backtest_cross_validation(k_folds=5, workers=args.workers)
 
@@ -9,8 +9,6 @@ Useful for understanding model performance in different contexts.
 """
 import os
 import sys
-from datetime import datetime, timedelta
-from collections import defaultdict
 from typing import Dict, List, Tuple, Optional
 import numpy as np
 
@@ -24,7 +22,43 @@ from src.espn_collector import get_espn_collector
 # Add scripts directory to path
 scripts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
 sys.path.insert(0, scripts_dir)
-from show_team_ratings_v3 import calculate_team_ratings
+from _season_data import game_datetimes, parallel_week_ratings, sequential_week_ratings, week_slices
+
+# Rough game total from the two ratings: BASE_TOTAL + (home + away) / TOTAL_RATING_SCALE
+BASE_TOTAL = 140
+TOTAL_RATING_SCALE = 10
+
+# Column store for every scored prediction (name -> dtype), one row per game
+# in prediction order; the summary statistics are computed from these arrays
+PREDICTION_COLUMNS = {
+    'predicted_margin': float,
+    'actual_margin': np.int16,
+    'vegas_spread': np.float32,  # NaN without a line
+    'has_spread': bool,
+    'has_total': bool,
+    'winner_correct': bool,
+    'ats_correct': bool,         # straight-up result for games without a line
+    'total_correct': bool,       # only meaningful where has_total
+}
+
+
+def _bucket_stats(edges: np.ndarray, hits: np.ndarray, low: float, high: float) -> Tuple[List[int], List[int]]:
+    """
+    Count games and correct picks per confidence bucket in one pass.
+    
+    Args:
+        edges: Non-negative confidence per game (e.g. |margin - spread|)
+        hits: Whether each pick was correct
+        low, high: Bucket bounds
+    
+    Returns:
+        (games per bucket, correct per bucket), indexed
+        0: edge <= low, 1: low < edge <= high, 2: edge > high
+    """
+    buckets = np.digitize(edges, (low, high), right=True)
+    counts = np.bincount(buckets, minlength=3)
+    correct = np.bincount(buckets[hits], minlength=3)
+    return counts.tolist(), correct.tolist()
 
 
 class ATSBacktester:
@@ -40,14 +74,16 @@ class ATSBacktester:
         self.results_with_spread = []
         self.results_without_spread = []
         self.all_predictions = []
+        self.columns = {name: np.empty(0, dtype=dtype) for name, dtype in PREDICTION_COLUMNS.items()}
     
-    def run_backtest(self, season: int = 2025, training_ratio: float = 0.7) -> Dict:
+    def run_backtest(self, season: int = 2025, training_ratio: float = 0.7, workers: int = 1) -> Dict:
         """
         Run backtest on a season with separate ATS tracking.
         
         Args:
             season: Season year to backtest
             training_ratio: Ratio of games to use for training (default 70%)
+            workers: Processes for the weekly ratings (1 = update them incrementally in-process)
         
         Returns:
             Dictionary with comprehensive accuracy metrics
@@ -67,14 +103,19 @@ class ATSBacktester:
             if g.get('HomeTeamScore') is not None and g.get('AwayTeamScore') is not None
         ]
         
-        # Parse dates
-        for game in completed_games:
-            try:
-                game['date_obj'] = datetime.fromisoformat(game['DateTime'].replace('Z', '+00:00'))
-            except:
-                game['date_obj'] = datetime.now()
+        # Parse dates as one datetime64 column; games without a parseable
+        # date are skipped rather than stamped with the current time
+        game_dates = game_datetimes(completed_games)
+        
+        dated = ~np.isnat(game_dates)
+        if not dated.all():
+            print(f"⚠️  Skipping {int((~dated).sum())} games with missing or invalid DateTime")
+            completed_games = [g for g, has_date in zip(completed_games, dated.tolist()) if has_date]
+            game_dates = game_dates[dated]
         
-        completed_games.sort(key=lambda x: x['date_obj'])
+        order = np.argsort(game_dates, kind='stable')
+        completed_games = [completed_games[i] for i in order.tolist()]
+        game_dates = game_dates[order]
         
         print(f"✓ Found {len(completed_games)} completed games")
         
@@ -91,133 +132,148 @@ class ATSBacktester:
         split_point = int(len(completed_games) * training_ratio)
         training_games = completed_games[:split_point]
         test_games = completed_games[split_point:]
+        test_dates = game_dates[split_point:]
         
         print(f"\n✓ Training set: {len(training_games)} games")
         print(f"✓ Test set: {len(test_games)} games")
         
-        # Group test games by week
-        weeks = defaultdict(list)
-        for game in test_games:
-            week_key = game['date_obj'].strftime('%Y-W%U')
-            weeks[week_key].append(game)
+        # Group test games by week (they are in date order)
+        weeks = [
+            (week_key, test_games[lo:hi], test_dates[lo:hi])
+            for week_key, lo, hi in week_slices(test_dates)
+        ]
+        
+        # Ratings for each week, from the games before it
+        week_games_list = [week_games for _, week_games, _ in weeks]
+        if workers > 1:
+            week_ratings = parallel_week_ratings(completed_games, len(training_games), week_games_list, workers)
+        else:
+            week_ratings = sequential_week_ratings(training_games, week_games_list)
         
-        current_training_games = training_games.copy()
+        # Each week's column arrays, concatenated into self.columns at the end
+        week_columns = {name: [] for name in PREDICTION_COLUMNS}
         
         print("\nRunning weekly predictions...")
         print("-" * 100)
         
-        for week_num, (week_key, week_games) in enumerate(sorted(weeks.items()), 1):
-            # Calculate ratings using games up to this week
-            try:
-                ratings_result = calculate_team_ratings(
-                    current_training_games, min_games=5, use_sos_adjustment=True
-                )
-                if isinstance(ratings_result, tuple):
-                    ratings, _ = ratings_result
-                else:
-                    ratings = ratings_result
-                ratings_dict = {r['team_id']: r for r in ratings}
-            except Exception as e:
-                print(f"Error calculating ratings for week {week_key}: {e}")
+        for week_num, ((week_key, week_games, week_dates), lookup) in enumerate(zip(weeks, week_ratings), 1):
+            if isinstance(lookup, Exception):
+                print(f"Error calculating ratings for week {week_key}: {lookup}")
                 continue
+            id_to_idx, overall = lookup
+            
+            # Rows of both teams in the ratings array (-1 = no rating). Test games
+            # are all completed, so a game is scored exactly when both teams are rated
+            home_idx = np.fromiter((id_to_idx.get(g.get('HomeTeamID'), -1) for g in week_games),
+                                   dtype=np.intp, count=len(week_games))
+            away_idx = np.fromiter((id_to_idx.get(g.get('AwayTeamID'), -1) for g in week_games),
+                                   dtype=np.intp, count=len(week_games))
+            rated = np.flatnonzero((home_idx >= 0) & (away_idx >= 0))
+            scored_games = [week_games[i] for i in rated.tolist()]
+            
+            # Struct-of-arrays for the week: one column per field, one row per scored game
+            home_ratings = overall[home_idx[rated]]
+            away_ratings = overall[away_idx[rated]]
+            home_scores = np.array([g['HomeTeamScore'] for g in scored_games], dtype=np.int64)
+            away_scores = np.array([g['AwayTeamScore'] for g in scored_games], dtype=np.int64)
+            # Missing lines become NaN; spreads are stored as-is, so picks and edges use the same value
+            vegas_spreads = np.array([np.nan if g.get('PointSpread') is None else g['PointSpread']
+                                      for g in scored_games], dtype=np.float32)
+            vegas_totals = np.array([np.nan if g.get('OverUnder') is None else g['OverUnder']
+                                     for g in scored_games], dtype=float)
+            
+            # Predicted margin (home team perspective)
+            predicted_margins = home_ratings - away_ratings
+            actual_margins = home_scores - away_scores
+            actual_totals = home_scores + away_scores
+            
+            # Determine winner prediction correctness
+            winner_correct = (predicted_margins > 0) == (actual_margins > 0)
+            
+            # ATS result where a spread is available:
+            # home covers if actual margin beats the spread; we pick home if our margin does
+            has_spread = ~np.isnan(vegas_spreads)
+            home_covered = actual_margins + vegas_spreads > 0
+            pick_home = predicted_margins + vegas_spreads > 0
+            # No spread - track implied spread (winner prediction)
+            ats_correct = np.where(has_spread, pick_home == home_covered, winner_correct)
             
-            week_results = {'with_spread': [], 'without_spread': []}
+            # Over/under where a total is also available
+            # Simplified total prediction: use average pace * ratings (rough estimate)
+            has_total = has_spread & ~np.isnan(vegas_totals)
+            predicted_totals = BASE_TOTAL + (home_ratings + away_ratings) / TOTAL_RATING_SCALE
+            pick_over = predicted_totals > vegas_totals
+            total_correct = pick_over == (actual_totals > vegas_totals)
             
-            for game in week_games:
-                home_id = game.get('HomeTeamID')
-                away_id = game.get('AwayTeamID')
-                home_score = game.get('HomeTeamScore')
-                away_score = game.get('AwayTeamScore')
+            for name, values in (('predicted_margin', predicted_margins), ('actual_margin', actual_margins),
+                                 ('vegas_spread', vegas_spreads), ('has_spread', has_spread),
+                                 ('has_total', has_total), ('winner_correct', winner_correct),
+                                 ('ats_correct', ats_correct), ('total_correct', total_correct)):
+                week_columns[name].append(values)
+            
+            # Prediction records are only materialized once the whole week is scored
+            for (game, date, predicted_margin, actual_margin, actual_total, home_rating, away_rating,
+                 game_winner_correct, game_has_spread, game_home_covered, game_pick_home,
+                 game_ats_correct, game_has_total, game_pick_over, game_total_correct) in zip(
+                    scored_games, week_dates[rated].tolist(), predicted_margins.tolist(), actual_margins.tolist(),
+                    actual_totals.tolist(), home_ratings.tolist(), away_ratings.tolist(),
+                    winner_correct.tolist(), has_spread.tolist(), home_covered.tolist(),
+                    pick_home.tolist(), ats_correct.tolist(), has_total.tolist(),
+                    pick_over.tolist(), total_correct.tolist()):
                 vegas_spread = game.get('PointSpread')
-                vegas_total = game.get('OverUnder')
-                
-                if not (home_id and away_id and home_score is not None and away_score is not None):
-                    continue
-                
-                if home_id not in ratings_dict or away_id not in ratings_dict:
-                    continue
-                
-                # Get ratings
-                home_rating = ratings_dict[home_id]['overall_rating']
-                away_rating = ratings_dict[away_id]['overall_rating']
-                
-                # Predicted margin (home team perspective)
-                predicted_margin = home_rating - away_rating
-                actual_margin = home_score - away_score
-                actual_total = home_score + away_score
                 
                 # Create prediction record
                 prediction = {
-                    'date': game['date_obj'],
+                    'date': date,
                     'home_team': game.get('HomeTeamName', 'Unknown'),
                     'away_team': game.get('AwayTeamName', 'Unknown'),
-                    'home_id': home_id,
-                    'away_id': away_id,
+                    'home_id': game['HomeTeamID'],
+                    'away_id': game['AwayTeamID'],
                     'predicted_margin': predicted_margin,
                     'actual_margin': actual_margin,
                     'actual_total': actual_total,
                     'home_rating': home_rating,
                     'away_rating': away_rating,
                     'vegas_spread': vegas_spread,
-                    'vegas_total': vegas_total,
-                    'has_vegas_line': vegas_spread is not None
+                    'vegas_total': game.get('OverUnder'),
+                    'has_vegas_line': vegas_spread is not None,
+                    'winner_correct': game_winner_correct
                 }
                 
-                # Determine winner prediction correctness
-                predicted_home_wins = predicted_margin > 0
-                actual_home_wins = actual_margin > 0
-                winner_correct = predicted_home_wins == actual_home_wins
-                prediction['winner_correct'] = winner_correct
-                
-                # Calculate ATS result if spread available
-                if vegas_spread is not None:
-                    # Home covers if actual margin beats the spread
-                    home_covered = actual_margin + vegas_spread > 0
-                    
-                    # Our pick: if predicted margin > spread, pick home
-                    pick_home = predicted_margin + vegas_spread > 0
-                    ats_correct = pick_home == home_covered
-                    
-                    prediction['spread_pick'] = 'HOME' if pick_home else 'AWAY'
-                    prediction['ats_correct'] = ats_correct
-                    prediction['home_covered'] = home_covered
+                if game_has_spread:
+                    prediction['spread_pick'] = 'HOME' if game_pick_home else 'AWAY'
+                    prediction['ats_correct'] = game_ats_correct
+                    prediction['home_covered'] = game_home_covered
                     
-                    # Over/under if available
-                    if vegas_total is not None:
-                        went_over = actual_total > vegas_total
-                        # Simplified total prediction: use average pace * ratings
-                        predicted_total = 140 + (home_rating + away_rating) / 10  # Rough estimate
-                        pick_over = predicted_total > vegas_total
-                        total_correct = pick_over == went_over
-                        prediction['total_correct'] = total_correct
-                        prediction['total_pick'] = 'OVER' if pick_over else 'UNDER'
+                    if game_has_total:
+                        prediction['total_correct'] = game_total_correct
+                        prediction['total_pick'] = 'OVER' if game_pick_over else 'UNDER'
                     
                     self.results_with_spread.append(prediction)
-                    week_results['with_spread'].append(prediction)
                 else:
-                    # No spread - track implied spread (winner prediction)
-                    prediction['ats_correct'] = winner_correct
+                    prediction['ats_correct'] = game_ats_correct
                     self.results_without_spread.append(prediction)
-                    week_results['without_spread'].append(prediction)
                 
                 self.all_predictions.append(prediction)
             
-            # Print weekly results
-            with_spread_correct = sum(1 for p in week_results['with_spread'] if p.get('ats_correct'))
-            without_spread_correct = sum(1 for p in week_results['without_spread'] if p.get('ats_correct'))
-            
-            with_count = len(week_results['with_spread'])
-            without_count = len(week_results['without_spread'])
+            # Print weekly results (one print per week)
+            with_count = int(has_spread.sum())
+            without_count = len(has_spread) - with_count
+            with_spread_correct = int(ats_correct[has_spread].sum())
+            without_spread_correct = int(ats_correct[~has_spread].sum())
             
             if with_count + without_count > 0:
-                print(f"Week {week_num} ({week_key}):")
+                week_lines = [f"Week {week_num} ({week_key}):"]
                 if with_count > 0:
-                    print(f"  With Vegas: {with_spread_correct}/{with_count} ATS ({with_spread_correct/with_count*100:.1f}%)")
+                    week_lines.append(f"  With Vegas: {with_spread_correct}/{with_count} ATS ({with_spread_correct/with_count*100:.1f}%)")
                 if without_count > 0:
-                    print(f"  Without Vegas: {without_spread_correct}/{without_count} S/U ({without_spread_correct/without_count*100:.1f}%)")
-            
-            # Add week's games to training set
-            current_training_games.extend(week_games)
+                    week_lines.append(f"  Without Vegas: {without_spread_correct}/{without_count} S/U ({without_spread_correct/without_count*100:.1f}%)")
+                print("\n".join(week_lines))
+        
+        self.columns = {
+            name: np.concatenate([self.columns[name]] + week_columns[name]).astype(dtype, copy=False)
+            for name, dtype in PREDICTION_COLUMNS.items()
+        }
         
         # Calculate final statistics
         return self._calculate_final_stats()
@@ -228,14 +284,20 @@ class ATSBacktester:
         print("BACKTESTING RESULTS - COMPREHENSIVE ATS ANALYSIS")
         print("=" * 100 + "\n")
         
+        cols = self.columns
+        with_spread = cols['has_spread']
+        without_spread = ~with_spread
+        ats_hits = cols['ats_correct'][with_spread]
+        su_hits = cols['ats_correct'][without_spread]
+        
         # WITH Vegas Lines (True ATS)
-        if self.results_with_spread:
-            ats_correct = sum(1 for p in self.results_with_spread if p.get('ats_correct'))
-            ats_total = len(self.results_with_spread)
+        if len(ats_hits):
+            ats_correct = int(ats_hits.sum())
+            ats_total = len(ats_hits)
             ats_accuracy = ats_correct / ats_total
             
-            total_correct = sum(1 for p in self.results_with_spread if p.get('total_correct'))
-            total_count = sum(1 for p in self.results_with_spread if p.get('total_correct') is not None)
+            total_correct = int((cols['total_correct'] & cols['has_total']).sum())
+            total_count = int(cols['has_total'].sum())
             total_accuracy = total_correct / total_count if total_count > 0 else 0
             
             print("📊 WITH VEGAS LINES (True ATS)")
@@ -247,23 +309,14 @@ class ATSBacktester:
                 print(f"Over/Under Accuracy: {total_accuracy*100:.2f}% ({total_correct}/{total_count})")
             print()
             
-            # Breakdown by confidence
-            high_conf = [p for p in self.results_with_spread 
-                        if abs(p['predicted_margin'] - p['vegas_spread']) > 5]
-            med_conf = [p for p in self.results_with_spread 
-                       if 2 < abs(p['predicted_margin'] - p['vegas_spread']) <= 5]
-            low_conf = [p for p in self.results_with_spread 
-                       if abs(p['predicted_margin'] - p['vegas_spread']) <= 2]
+            # Breakdown by confidence (edge = distance between our margin and the line)
+            edges = np.abs(cols['predicted_margin'][with_spread] - cols['vegas_spread'][with_spread])
+            counts, correct = _bucket_stats(edges, ats_hits, low=2, high=5)
             
-            if high_conf:
-                high_acc = sum(1 for p in high_conf if p.get('ats_correct')) / len(high_conf) * 100
-                print(f"  High Edge (>5 pts vs line): {len(high_conf)} games, {high_acc:.1f}% ATS")
-            if med_conf:
-                med_acc = sum(1 for p in med_conf if p.get('ats_correct')) / len(med_conf) * 100
-                print(f"  Medium Edge (2-5 pts): {len(med_conf)} games, {med_acc:.1f}% ATS")
-            if low_conf:
-                low_acc = sum(1 for p in low_conf if p.get('ats_correct')) / len(low_conf) * 100
-                print(f"  Low Edge (<2 pts): {len(low_conf)} games, {low_acc:.1f}% ATS")
+            for bucket, label in ((2, "High Edge (>5 pts vs line)"), (1, "Medium Edge (2-5 pts)"),
+                                  (0, "Low Edge (<2 pts)")):
+                if counts[bucket]:
+                    print(f"  {label}: {counts[bucket]} games, {correct[bucket] / counts[bucket] * 100:.1f}% ATS")
         else:
             ats_accuracy = 0
             print("📊 WITH VEGAS LINES: No games with spread data available")
@@ -271,9 +324,9 @@ class ATSBacktester:
         print()
         
         # WITHOUT Vegas Lines (Implied Spread / Straight-Up)
-        if self.results_without_spread:
-            su_correct = sum(1 for p in self.results_without_spread if p.get('ats_correct'))
-            su_total = len(self.results_without_spread)
+        if len(su_hits):
+            su_correct = int(su_hits.sum())
+            su_total = len(su_hits)
             su_accuracy = su_correct / su_total
             
             print("📊 WITHOUT VEGAS LINES (Straight-Up)")
@@ -284,19 +337,13 @@ class ATSBacktester:
             print()
             
             # Breakdown by predicted margin
-            high_conf = [p for p in self.results_without_spread if abs(p['predicted_margin']) > 10]
-            med_conf = [p for p in self.results_without_spread if 5 < abs(p['predicted_margin']) <= 10]
-            low_conf = [p for p in self.results_without_spread if abs(p['predicted_margin']) <= 5]
+            edges = np.abs(cols['predicted_margin'][without_spread])
+            counts, correct = _bucket_stats(edges, su_hits, low=5, high=10)
             
-            if high_conf:
-                high_acc = sum(1 for p in high_conf if p.get('ats_correct')) / len(high_conf) * 100
-                print(f"  High Confidence (>10 pts): {len(high_conf)} games, {high_acc:.1f}%")
-            if med_conf:
-                med_acc = sum(1 for p in med_conf if p.get('ats_correct')) / len(med_conf) * 100
-                print(f"  Medium Confidence (5-10 pts): {len(med_conf)} games, {med_acc:.1f}%")
-            if low_conf:
-                low_acc = sum(1 for p in low_conf if p.get('ats_correct')) / len(low_conf) * 100
-                print(f"  Low Confidence (<5 pts): {len(low_conf)} games, {low_acc:.1f}%")
+            for bucket, label in ((2, "High Confidence (>10 pts)"), (1, "Medium Confidence (5-10 pts)"),
+                                  (0, "Low Confidence (<5 pts)")):
+                if counts[bucket]:
+                    print(f"  {label}: {counts[bucket]} games, {correct[bucket] / counts[bucket] * 100:.1f}%")
         else:
             su_accuracy = 0
             print("📊 WITHOUT VEGAS LINES: No games without spread data")
@@ -304,8 +351,8 @@ class ATSBacktester:
         print()
         
         # Combined Statistics
-        all_correct = sum(1 for p in self.all_predictions if p.get('winner_correct'))
-        all_total = len(self.all_predictions)
+        all_correct = int(cols['winner_correct'].sum())
+        all_total = len(cols['winner_correct'])
         combined_accuracy = all_correct / all_total if all_total > 0 else 0
         
         print("📊 COMBINED (All Games - Winner Prediction)")
@@ -316,9 +363,11 @@ class ATSBacktester:
         print()
         
         # Margin error analysis
-        margins = [abs(p['predicted_margin'] - p['actual_margin']) for p in self.all_predictions]
-        if margins:
-            avg_margin_error = np.mean(margins)
+        # (np.median already selects with np.partition rather than sorting)
+        margins = np.abs(cols['predicted_margin'] - cols['actual_margin'])
+        avg_margin_error = median_margin_error = None
+        if len(margins):
+            avg_margin_error = margins.mean()
             median_margin_error = np.median(margins)
             print(f"Average Margin Error: {avg_margin_error:.2f} points")
             print(f"Median Margin Error: {median_margin_error:.2f} points")
@@ -328,24 +377,24 @@ class ATSBacktester:
         # Return comprehensive results
         return {
             "with_vegas_lines": {
-                "total": len(self.results_with_spread),
-                "ats_correct": sum(1 for p in self.results_with_spread if p.get('ats_correct')),
-                "ats_accuracy": ats_accuracy if self.results_with_spread else None,
-                "total_correct": sum(1 for p in self.results_with_spread if p.get('total_correct')),
+                "total": len(ats_hits),
+                "ats_correct": int(ats_hits.sum()),
+                "ats_accuracy": ats_accuracy if len(ats_hits) else None,
+                "total_correct": int((cols['total_correct'] & cols['has_total']).sum()),
                 "results": self.results_with_spread
             },
             "without_vegas_lines": {
-                "total": len(self.results_without_spread),
-                "correct": sum(1 for p in self.results_without_spread if p.get('ats_correct')),
-                "accuracy": su_accuracy if self.results_without_spread else None,
+                "total": len(su_hits),
+                "correct": int(su_hits.sum()),
+                "accuracy": su_accuracy if len(su_hits) else None,
                 "results": self.results_without_spread
             },
             "combined": {
                 "total": all_total,
                 "winner_correct": all_correct,
                 "winner_accuracy": combined_accuracy,
-                "avg_margin_error": np.mean(margins) if margins else None,
-                "median_margin_error": np.median(margins) if margins else None
+                "avg_margin_error": avg_margin_error,
+                "median_margin_error": median_margin_error
             }
         }
     
@@ -354,46 +403,64 @@ class ATSBacktester:
         output_dir = os.path.dirname(os.path.abspath(__file__))
         output_path = os.path.join(output_dir, filename)
         
-        with open(output_path, 'w') as f:
-            f.write("=" * 100 + "\n")
-            f.write("BACKTESTING RESULTS WITH ATS TRACKING\n")
-            f.write("=" * 100 + "\n\n")
-            
-            # Summary
-            if self.results_with_spread:
-                ats_correct = sum(1 for p in self.results_with_spread if p.get('ats_correct'))
-                f.write(f"WITH VEGAS LINES: {ats_correct}/{len(self.results_with_spread)} ATS ")
-                f.write(f"({ats_correct/len(self.results_with_spread)*100:.1f}%)\n")
-            
-            if self.results_without_spread:
-                su_correct = sum(1 for p in self.results_without_spread if p.get('ats_correct'))
-                f.write(f"WITHOUT VEGAS LINES: {su_correct}/{len(self.results_without_spread)} ")
-                f.write(f"({su_correct/len(self.results_without_spread)*100:.1f}%)\n")
-            
-            f.write("\n" + "-" * 100 + "\n")
-            f.write("DETAILED PREDICTIONS (WITH VEGAS LINES)\n")
-            f.write("-" * 100 + "\n\n")
-            
-            for i, p in enumerate(self.results_with_spread[:100], 1):  # Limit to first 100
-                status = "✓" if p.get('ats_correct') else "✗"
-                f.write(f"{i}. {p['date'].strftime('%Y-%m-%d')} - {p['away_team']} @ {p['home_team']}\n")
-                f.write(f"   Vegas Spread: {p['vegas_spread']:+.1f}\n")
-                f.write(f"   Our Edge: {p['predicted_margin'] - p['vegas_spread']:+.1f}\n")
-                f.write(f"   Pick: {p.get('spread_pick', 'N/A')}\n")
-                f.write(f"   Actual: {p['actual_margin']:+d}\n")
-                f.write(f"   Result: {status}\n\n")
+        with_spread = self.columns['has_spread']
+        ats_hits = self.columns['ats_correct'][with_spread]
+        su_hits = self.columns['ats_correct'][~with_spread]
+        
+        lines = [
+            "=" * 100 + "\n",
+            "BACKTESTING RESULTS WITH ATS TRACKING\n",
+            "=" * 100 + "\n\n",
+        ]
+        
+        # Summary
+        if len(ats_hits):
+            ats_correct = int(ats_hits.sum())
+            lines.append(f"WITH VEGAS LINES: {ats_correct}/{len(ats_hits)} ATS "
+                         f"({ats_correct/len(ats_hits)*100:.1f}%)\n")
+        
+        if len(su_hits):
+            su_correct = int(su_hits.sum())
+            lines.append(f"WITHOUT VEGAS LINES: {su_correct}/{len(su_hits)} "
+                         f"({su_correct/len(su_hits)*100:.1f}%)\n")
+        
+        lines.append("\n" + "-" * 100 + "\n"
+                     "DETAILED PREDICTIONS (WITH VEGAS LINES)\n" +
+                     "-" * 100 + "\n\n")
+        
+        # One formatted block per prediction (first 100), written to disk in a single call
+        lines.extend(
+            f"{i}. {p['date']:%Y-%m-%d} - {p['away_team']} @ {p['home_team']}\n"
+            f"   Vegas Spread: {p['vegas_spread']:+.1f}\n"
+            f"   Our Edge: {p['predicted_margin'] - p['vegas_spread']:+.1f}\n"
+            f"   Pick: {p.get('spread_pick', 'N/A')}\n"
+            f"   Actual: {p['actual_margin']:+d}\n"
+            f"   Result: {'✓' if p.get('ats_correct') else '✗'}\n\n"
+            for i, p in enumerate(self.results_with_spread[:100], 1)
+        )
+        
+        with open(output_path, 'w', buffering=1 << 20) as f:
+            f.write(''.join(lines))
         
         print(f"\n✓ Detailed results saved to {output_path}")
 
 
-def run_ats_backtest():
+def run_ats_backtest(workers: int = 1):
     """Main function to run ATS backtest."""
     backtester = ATSBacktester()
-    results = backtester.run_backtest(season=2025)
+    results = backtester.run_backtest(season=2025, workers=workers)
     backtester.save_results()
     return results
 
 
 if __name__ == "__main__":
-    run_ats_backtest()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Backtest with ATS tracking")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes for the weekly ratings (default: 1, updated incrementally in-process)")
+    
+    args = parser.parse_args()
+    
+    run_ats_backtest(workers=args.workers)
 
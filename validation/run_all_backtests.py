@@ -1,17 +1,65 @@
 """
-Master script to run all three backtesting options sequentially.
+Master script to run all three backtesting options (sequentially, or concurrently with --parallel).
 Provides comprehensive validation of the rating system.
 """
 import sys
 import os
+import contextlib
 import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # Add parent directory to path so we can import from validation modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def run_all_backtests():
-    """Run all three backtesting options and generate summary report."""
+# option -> (banner line, name used in failure messages)
+BACKTESTS = {
+    'option1': ("█" + " "*40 + "OPTION 1: LAST SEASON" + " "*39 + "█", "Option 1"),
+    'option2': ("█" + " "*35 + "OPTION 2: ROLLING VALIDATION" + " "*36 + "█", "Option 2"),
+    'option3': ("█" + " "*34 + "OPTION 3: CROSS-VALIDATION" + " "*39 + "█", "Option 3"),
+}
+
+def _run_option(option):
+    """
+    Import and run one backtest, printing its output as it goes.
+    
+    Imports stay lazy so an import error counts as that option failing.
+    
+    Returns:
+        'COMPLETED' or 'FAILED: <error>'
+    """
+    try:
+        if option == 'option1':
+            from backtest_option1_last_season import backtest_last_season
+            backtest_last_season()
+        elif option == 'option2':
+            from backtest_option2_rolling import backtest_rolling_current_season
+            backtest_rolling_current_season()
+        else:
+            from backtest_option3_cross_validation import backtest_cross_validation
+            backtest_cross_validation(k_folds=5)
+        return 'COMPLETED'
+    except Exception as e:
+        print(f"✗ {BACKTESTS[option][1]} failed: {e}")
+        return f'FAILED: {e}'
+
+def _log_path(option):
+    """Log file an option's output goes to when the options run in parallel."""
+    return f"backtest_log_{option}.txt"
+
+def _run_backtest(option):
+    """Pool task: run one backtest with its output streamed, line by line, to its log file."""
+    with open(_log_path(option), 'w', buffering=1) as log, contextlib.redirect_stdout(log):
+        return _run_option(option)
+
+def run_all_backtests(parallel=False):
+    """
+    Run all three backtesting options and generate summary report.
+    
+    With parallel=True each option runs in its own process and writes its
+    output to backtest_log_<option>.txt as it goes (follow it with tail -f);
+    the logs are printed in option order once each option finishes.
+    """
     
     print("\n" + "="*100)
     print("COMPREHENSIVE BACKTESTING SUITE")
@@ -32,50 +80,47 @@ def run_all_backtests():
     results = {}
     start_time = time.time()
     
-    # Option 1: Last Season
-    print("\n" + "█"*100)
-    print("█" + " "*40 + "OPTION 1: LAST SEASON" + " "*39 + "█")
-    print("█"*100 + "\n")
-    
-    try:
-        from backtest_option1_last_season import backtest_last_season
-        backtest_last_season()
-        results['option1'] = 'COMPLETED'
-    except Exception as e:
-        print(f"✗ Option 1 failed: {e}")
-        results['option1'] = f'FAILED: {e}'
-    
-    print("\n")
-    time.sleep(2)
-    
-    # Option 2: Rolling Validation
-    print("\n" + "█"*100)
-    print("█" + " "*35 + "OPTION 2: ROLLING VALIDATION" + " "*36 + "█")
-    print("█"*100 + "\n")
-    
-    try:
-        from backtest_option2_rolling import backtest_rolling_current_season
-        backtest_rolling_current_season()
-        results['option2'] = 'COMPLETED'
-    except Exception as e:
-        print(f"✗ Option 2 failed: {e}")
-        results['option2'] = f'FAILED: {e}'
-    
-    print("\n")
-    time.sleep(2)
-    
-    # Option 3: Cross-Validation
-    print("\n" + "█"*100)
-    print("█" + " "*34 + "OPTION 3: CROSS-VALIDATION" + " "*39 + "█")
-    print("█"*100 + "\n")
-    
-    try:
-        from backtest_option3_cross_validation import backtest_cross_validation
-        backtest_cross_validation(k_folds=5)
-        results['option3'] = 'COMPLETED'
-    except Exception as e:
-        print(f"✗ Option 3 failed: {e}")
-        results['option3'] = f'FAILED: {e}'
+    if not parallel:
+        for option in BACKTESTS:
+            print("\n" + "█"*100)
+            print(BACKTESTS[option][0])
+            print("█"*100 + "\n")
+            
+            results[option] = _run_option(option)
+            print("\n")
+    else:
+        # Crawl each season once up front; the backtests then load it from the day's cache
+        try:
+            from _season_data import cached_season_games
+            for season in (2025, 2026):
+                cached_season_games(season)
+        except Exception as e:
+            print(f"⚠️  Could not prefetch season games: {e}")
+        
+        print("Running the backtests in parallel; follow their progress with:")
+        for option in BACKTESTS:
+            print(f"  tail -f {_log_path(option)}")
+        
+        with ProcessPoolExecutor(max_workers=len(BACKTESTS)) as pool:
+            futures = {option: pool.submit(_run_backtest, option) for option in BACKTESTS}
+            for option, future in futures.items():
+                print("\n" + "█"*100)
+                print(BACKTESTS[option][0])
+                print("█"*100 + "\n")
+                
+                try:
+                    results[option] = future.result()
+                    error = None
+                except Exception as e:
+                    results[option] = f'FAILED: {e}'
+                    error = e
+                # Whatever the option logged, even if its process died part way
+                if os.path.exists(_log_path(option)):
+                    with open(_log_path(option)) as log:
+                        print(log.read(), end='')
+                if error is not None:
+                    print(f"✗ {BACKTESTS[option][1]} failed: {error}")
+                print("\n")
     
     # Summary
     elapsed_time = time.time() - start_time
@@ -96,6 +141,9 @@ def run_all_backtests():
     print("  • backtest_results_option1_last_season.txt")
     print("  • backtest_results_option2_rolling.txt")
     print("  • backtest_results_option3_cross_validation.txt")
+    if parallel:
+        for option in BACKTESTS:
+            print(f"  • {_log_path(option)}")
     print()
     print("Next Steps:")
     print("  1. Review detailed results in output files")
@@ -107,5 +155,13 @@ def run_all_backtests():
     print()
 
 if __name__ == "__main__":
-    run_all_backtests()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Run all three backtesting options")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Run the options concurrently, each logging to backtest_log_<option>.txt")
+    
+    args = parser.parse_args()
+    
+    run_all_backtests(parallel=args.parallel)
 